@@ -0,0 +1,276 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Process names of Chromium and chromedriver, as reported by /proc/<pid>/comm (truncated to 15 characters).
+BROWSER_PROCESS_NAMES = {"chrome", "chromium", "chromium-browse", "chromedriver", "headless_shell"}
+
+# Seconds a resident size sample is reused before /proc is scanned again.
+MEMORY_SAMPLE_INTERVAL = 1.0
+
+
+class AdmissionCancelled(Exception):
+    """
+    Raised in background work that was cancelled while it waited for its turn.
+    """
+
+
+class BackgroundWork:
+    """
+    Speculative work, ie: a prefetch, whose admissions yield to every caller that is not background work. It can be
+    cancelled while it waits, and is promoted to a normal caller once a real caller depends on its result.
+    """
+
+    def __init__(self) -> None:
+        self.promoted = False
+        self._cancelled = threading.Event()
+
+    @property
+    def background(self) -> bool:
+        return not self.promoted
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set() and not self.promoted
+
+    def cancel(self) -> None:
+        """
+        Makes the work's pending and future admissions raise AdmissionCancelled, unless it has been promoted.
+
+        Returns:
+            None
+        """
+        self._cancelled.set()
+
+    def promote(self) -> None:
+        """
+        Gives the work the same priority as any other caller, and ignores any cancellation.
+
+        Returns:
+            None
+        """
+        self.promoted = True
+
+
+_background_work: contextvars.ContextVar[BackgroundWork | None] = contextvars.ContextVar("background_work",
+                                                                                        default=None)
+
+
+@contextmanager
+def running_in_background(work: BackgroundWork) -> Iterator[None]:
+    """
+    Marks the admissions made in this context as belonging to background work.
+
+    Args:
+        work: The background work.
+
+    Returns:
+        A context manager that restores the previous marking on exit.
+    """
+    token = _background_work.set(work)
+    try:
+        yield
+    finally:
+        _background_work.reset(token)
+
+
+def current_background_work() -> BackgroundWork | None:
+    """
+    Returns the background work the current context belongs to.
+
+    Returns:
+        The background work, or None for a real caller.
+    """
+    return _background_work.get()
+
+
+class AdmissionStats(NamedTuple):
+    active: int
+    queued: int
+    browser_rss: int
+    average_wait: float
+
+
+class AdmissionController:
+    """
+    Admits callers to a scarce resource in strict arrival order. A caller is admitted once everyone ahead of it has
+    been, fewer than max_active callers hold the resource, and the browsers' resident memory is under budget.
+    Background work is only admitted while no other caller is waiting.
+    """
+
+    def __init__(self, max_active: int, memory_budget: int, reclaim: Callable[[], bool] | None = None) -> None:
+        """
+        Initializes the controller.
+
+        Args:
+            max_active: Maximum number of callers admitted at once.
+            memory_budget: Maximum resident size in bytes of every browser process combined. 0 disables the budget.
+            reclaim: Optional callable invoked while the budget is exceeded, ie: to quit an idle browser. Returns
+                True if it freed something.
+        """
+        self.max_active = max_active
+        self.memory_budget = memory_budget
+        self.reclaim = reclaim
+
+        self._condition = threading.Condition()
+        self._queue: deque[BackgroundWork | object] = deque()
+        self._active = 0
+        self._waits: deque[float] = deque(maxlen=50)
+
+    @contextmanager
+    def admit(self, timeout: float | None = None) -> Iterator[float]:
+        """
+        Waits for this caller's turn.
+
+        Args:
+            timeout: Optional seconds to wait for the turn.
+
+        Returns:
+            A context manager yielding the seconds spent waiting. The caller's slot is released on exit.
+
+        Raises:
+            AdmissionCancelled: If the caller is background work that was cancelled while it waited.
+            TimeoutError: If the timeout ran out first.
+        """
+        # Background work queues its own ticket, so that its priority follows the work's promotion.
+        ticket = current_background_work() or object()
+        start = time.perf_counter()
+
+        with self._condition:
+            self._queue.append(ticket)
+            try:
+                while not self._can_admit(ticket):
+                    if isinstance(ticket, BackgroundWork) and ticket.cancelled:
+                        raise AdmissionCancelled("Background work was cancelled while it waited for a browser.")
+
+                    remaining = None if timeout is None else timeout - (time.perf_counter() - start)
+                    if (remaining is not None) and (remaining <= 0):
+                        raise TimeoutError(f"Gave up waiting for a browser after {timeout:.1f}s.")
+
+                    # Memory and promotions are not signalled with a notification, so they are re-checked
+                    # periodically.
+                    self._condition.wait(MEMORY_SAMPLE_INTERVAL if remaining is None
+                                         else min(MEMORY_SAMPLE_INTERVAL, remaining))
+            finally:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+
+            self._active += 1
+
+        wait = time.perf_counter() - start
+        self._waits.append(wait)
+        if wait >= 1:
+            logger.info("Admitted a browser lease after waiting %.2fs", wait)
+
+        try:
+            yield wait
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def stats(self) -> AdmissionStats:
+        """
+        Returns a snapshot of the controller's state.
+
+        Returns:
+            The number of admitted and queued callers, the browsers' resident size in bytes and the average wait in
+            seconds of the recent admissions.
+        """
+        with self._condition:
+            active, queued = self._active, len(self._queue)
+
+        waits = list(self._waits)
+        average_wait = sum(waits) / len(waits) if waits else 0.0
+
+        return AdmissionStats(active, queued, browser_rss_bytes(), average_wait)
+
+    def _can_admit(self, ticket: object) -> bool:
+        if isinstance(ticket, BackgroundWork) and ticket.cancelled:
+            return False
+
+        # Callers are served in arrival order, except that background work waits behind every other caller.
+        waiting = [queued for queued in self._queue if not is_background(queued)] or list(self._queue)
+        if (waiting[0] is not ticket) or (self._active >= self.max_active):
+            return False
+
+        # A caller is always admitted when nothing else holds the resource, so the budget cannot deadlock the queue.
+        if (self.memory_budget <= 0) or (self._active == 0):
+            return True
+
+        if browser_rss_bytes() < self.memory_budget:
+            return True
+
+        if (self.reclaim is not None) and self.reclaim():
+            return browser_rss_bytes(refresh=True) < self.memory_budget
+
+        return False
+
+
+def is_background(ticket: object) -> bool:
+    """
+    Checks whether an admission ticket belongs to background work that has not been promoted.
+
+    Args:
+        ticket: The ticket.
+
+    Returns:
+        True for background work.
+    """
+    return isinstance(ticket, BackgroundWork) and ticket.background
+
+
+_rss_sample = (0.0, 0)
+_rss_lock = threading.Lock()
+
+
+def browser_rss_bytes(refresh: bool = False) -> int:
+    """
+    Sums the resident size of every Chromium and chromedriver process, sampled from /proc at most once per
+    MEMORY_SAMPLE_INTERVAL.
+
+    Args:
+        refresh: Ignore the previous sample.
+
+    Returns:
+        The combined resident size in bytes, or 0 where /proc is unavailable.
+    """
+    global _rss_sample
+
+    with _rss_lock:
+        sampled_at, rss = _rss_sample
+        if refresh or (time.monotonic() - sampled_at > MEMORY_SAMPLE_INTERVAL):
+            rss = _sample_browser_rss()
+            _rss_sample = (time.monotonic(), rss)
+
+    return rss
+
+
+def _sample_browser_rss() -> int:
+    try:
+        pids = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return 0
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/comm", "r") as file:
+                if file.read().strip() not in BROWSER_PROCESS_NAMES:
+                    continue
+            with open(f"/proc/{pid}/statm", "r") as file:
+                total += int(file.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            # The process exited while it was being read.
+            continue
+
+    return total
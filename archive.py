@@ -0,0 +1,206 @@
+import contextvars
+import io
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+from config import ARCHIVE_SPILL_THRESHOLD
+
+# Entries with these extensions are already compressed, so deflating them only costs CPU.
+STORED_EXTENSIONS = (".pdf", ".zip", ".png", ".jpg", ".jpeg")
+
+
+_recordings: contextvars.ContextVar[tuple[tuple["ArchiveWriter", list[str]], ...]] = contextvars.ContextVar(
+    "archive_recordings", default=())
+
+
+class ArchiveWriter:
+    """
+    Zip archive that is opened once per scrape and shared by every job writing to it.
+
+    The archive is kept in memory until it grows past a threshold, after which it spills to a temporary file.
+    Writes from concurrent producers are serialized.
+    """
+
+    def __init__(self, spill_threshold: int = ARCHIVE_SPILL_THRESHOLD) -> None:
+        """
+        Initializes an empty archive.
+
+        Args:
+            spill_threshold: Size in bytes past which the archive is moved from memory to a temporary file.
+        """
+        self._file = tempfile.SpooledTemporaryFile(max_size=spill_threshold)
+        self._zip: zipfile.ZipFile | None = zipfile.ZipFile(self._file, "w")
+        self._lock = threading.Lock()
+
+    def write(self, filename: str, data: bytes) -> None:
+        """
+        Adds a file to the archive.
+
+        Args:
+            filename: Name of the file inside the archive.
+            data: Contents of the file.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._ensure_open().writestr(filename, data, compress_type=compression_for(filename))
+
+        self._record(filename)
+
+    @contextmanager
+    def open_entry(self, filename: str) -> Iterator[IO[bytes]]:
+        """
+        Opens a file inside the archive for incremental writing. Other writers wait until the entry is closed.
+
+        Args:
+            filename: Name of the file inside the archive.
+
+        Returns:
+            A context manager yielding a writable file object for the entry.
+        """
+        zip_info = zipfile.ZipInfo(filename, date_time=time.localtime()[:6])
+        zip_info.compress_type = compression_for(filename)
+
+        with self._lock, self._ensure_open().open(zip_info, "w", force_zip64=True) as entry:
+            yield entry
+
+        self._record(filename)
+
+    @contextmanager
+    def recording(self) -> Iterator[list[str]]:
+        """
+        Records the names of the files written to the archive from this context, including from worker threads that
+        run in a copy of it. Files written by other jobs sharing the archive are not recorded.
+
+        Returns:
+            A context manager yielding the list the names are appended to.
+        """
+        filenames = []
+        token = _recordings.set(_recordings.get() + ((self, filenames),))
+        try:
+            yield filenames
+        finally:
+            _recordings.reset(token)
+
+    def namelist(self) -> list[str]:
+        """
+        Lists the files written to the archive so far.
+
+        Returns:
+            The names of the files in the archive.
+        """
+        with self._lock:
+            return self._ensure_open().namelist()
+
+    def copy_to(self, archive: "ArchiveWriter", filenames: list[str] | None = None) -> list[str]:
+        """
+        Copies files from this archive into another archive, streaming each entry rather than loading it whole. This
+        archive stays open for writing.
+
+        Args:
+            archive: The archive to copy the files into.
+            filenames: Names of the files to copy. Defaults to every file.
+
+        Returns:
+            The names of the copied files.
+        """
+        if filenames is None:
+            filenames = self.namelist()
+
+        for filename in filenames:
+            # Each entry goes through a temporary file so that the two archives are never locked at once.
+            with tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPILL_THRESHOLD) as buffer:
+                with self._lock, self._ensure_open().open(filename) as source_entry:
+                    shutil.copyfileobj(source_entry, buffer, 64 * 1024)
+
+                buffer.seek(0)
+                with archive.open_entry(filename) as entry:
+                    shutil.copyfileobj(buffer, entry, 64 * 1024)
+
+        return filenames
+
+    def download_file(self) -> io.BufferedReader:
+        """
+        Finalizes the archive and returns a reader over it, suitable for st.download_button. The archive can still be
+        written to afterwards, in which case it is reopened in append mode.
+
+        Returns:
+            A reader positioned at the start of the zip file.
+        """
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+
+            self._file.seek(0)
+            return io.BufferedReader(_ArchiveReader(self._file))
+
+    def close(self) -> None:
+        """
+        Finalizes the archive and releases its memory or temporary file.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._zip is not None:
+                self._zip.close()
+                self._zip = None
+
+            self._file.close()
+
+    def _record(self, filename: str) -> None:
+        for archive, filenames in _recordings.get():
+            if archive is self:
+                filenames.append(filename)
+
+    def _ensure_open(self) -> zipfile.ZipFile:
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self._file, "a")
+
+        return self._zip
+
+
+class _ArchiveReader(io.RawIOBase):
+    """
+    Read-only view of the archive's backing file.
+    """
+
+    def __init__(self, file: IO[bytes]) -> None:
+        self._file = file
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def compression_for(filename: str) -> int:
+    """
+    Picks the compression method for an archive entry.
+
+    Args:
+        filename: Name of the file inside the archive.
+
+    Returns:
+        zipfile.ZIP_STORED for already-compressed formats such as PDF, zipfile.ZIP_DEFLATED otherwise.
+    """
+    return zipfile.ZIP_STORED if filename.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
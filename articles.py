@@ -1,20 +1,60 @@
 import datetime as dt
+import json
 import time
-from io import StringIO, BytesIO
+from typing import Iterator, NamedTuple
 
 import pandas as pd
-import streamlit as st
 from bs4 import BeautifulSoup, Tag
 from pandas import DataFrame
 from selenium.common import TimeoutException, WebDriverException
 
-from utils import initialize_web_driver, sanitize_html, print_pdf_to_zipfile
+import events
+from archive import ArchiveWriter
+from cache import get_result, put_result
+from coalesce import coalesced
+from config import ARTICLE_TABS, ARTICLE_TIMEOUT, CACHE_TTLS
+from driver_pool import borrow_driver
+from pages import load_page, load_pages_in_tabs
+from utils import cached_print_to_zipfile, sanitize_html, print_pdf_to_zipfile
 
 
+class ArticleRow(NamedTuple):
+    date: dt.date
+    headline: str
+    url: str
+
+
+class ArticleIndex(NamedTuple):
+    articles: list[ArticleRow]
+    covered_from: dt.date | None
+    updated_at: float
+
+    def covers(self, start_date: dt.date) -> bool:
+        """
+        Whether every article posted since a date is already indexed, as of the last update.
+
+        Args:
+            start_date: The date.
+
+        Returns:
+            True if the index holds every article from start_date up to its last update.
+        """
+        return (self.covered_from is not None) and (self.covered_from <= start_date)
+
+    @property
+    def newest(self) -> dt.date | None:
+        return max((article.date for article in self.articles), default=None)
+
+
+@coalesced("articles")
 def fetch_articles(team_data: dict, date_range: tuple[dt.date, dt.date]) -> DataFrame | None:
     """
     Fetches a team's articles, returning their headlines and URLs.
 
+    Articles are looked up in the team's persistent article index. The archives page is only scanned when the index
+    is stale or does not reach back to the start of the range, and the scan stops as soon as it reaches articles that
+    are already indexed or older than the range.
+
     Args:
         team_data: Dictionary containing team data.
         date_range: Range of dates to fetch articles from.
@@ -22,141 +62,213 @@ def fetch_articles(team_data: dict, date_range: tuple[dt.date, dt.date]) -> Data
     Returns:
         DataFrame of articles to download containing the date posted, headline, and URL. None is returned if no articles were found.
     """
-    driver = initialize_web_driver()
+    start_date, end_date = date_range
+    index = load_article_index(team_data["name"])
+
+    if index.covers(start_date) and (time.time() - index.updated_at < CACHE_TTLS["articles"]):
+        events.succeeded("Fetching Articles")
+        return articles_in_range(index, date_range)
 
     article_display_type = team_data["article_display_type"]
-    articles_df = None
-
-    try:
-        driver.get(team_data["articles_url"])
-        time.sleep(1)
-
-        doc = BeautifulSoup(driver.page_source, "lxml")
-
-        if article_display_type == "table":
-            table = doc.find("table")
-            if table:
-                articles_df = scan_table_for_articles(team_data, table, date_range)
-        elif article_display_type == "list":
-            div = doc.find("div", class_="vue-archives-stories")
-            if div:
-                ul = div.find("ul")
-                articles_df = scan_ul_for_articles(team_data, ul, date_range)
-
-        if articles_df is not None:
-            st.write(f"**Fetching Articles** :white_check_mark:")
-            return articles_df
-    except TimeoutException as e:
-        st.write(f"**Fetching Articles** :x:  \nReason: {e.msg}")
-    except WebDriverException as e:
-        st.write(f"**Fetching Articles** :x:  \nReason: {e.msg}")
-    finally:
-        driver.quit()
+
+    with borrow_driver() as driver:
+        try:
+            load_page(driver, team_data["articles_url"], f"archives_{article_display_type}")
+
+            doc = BeautifulSoup(driver.page_source, "lxml")
+
+            rows = None
+            if article_display_type == "table":
+                table = doc.find("table")
+                if table:
+                    rows = scan_table_for_articles(team_data, table)
+            elif article_display_type == "list":
+                div = doc.find("div", class_="vue-archives-stories")
+                if div:
+                    ul = div.find("ul")
+                    rows = scan_ul_for_articles(team_data, ul)
+
+            if rows is not None:
+                index = update_article_index(team_data["name"], index, rows, start_date)
+                events.succeeded("Fetching Articles")
+                return articles_in_range(index, date_range)
+        except TimeoutException as e:
+            events.failed("Fetching Articles", e.msg)
+        except WebDriverException as e:
+            events.failed("Fetching Articles", e.msg)
 
     return None
 
 
-def download_articles(articles: DataFrame, zip_buffer: BytesIO) -> None:
+def load_article_index(team_name: str) -> ArticleIndex:
     """
-    Downloads selected articles into respective PDF files.
+    Loads a team's article index from the result cache.
 
     Args:
-        articles: DataFrame of articles to download containing the date posted, headline, and URL.
-        zip_buffer: Bytes buffer containing the roster page.
+        team_name: Name of the team.
 
     Returns:
-        None
+        The team's article index, empty if it has never been built.
     """
-    if len(articles) == 0:
-        return
+    body = get_result(team_name, "article_index", "index")
+    if body is None:
+        return ArticleIndex([], None, 0.0)
+
+    data = json.loads(body)
+    articles = [ArticleRow(dt.date.fromisoformat(date), headline, url) for date, headline, url in data["articles"]]
+    covered_from = dt.date.fromisoformat(data["covered_from"]) if data["covered_from"] else None
 
-    driver = initialize_web_driver()
-
-    script = """
-        let removed = document.getElementById('divSatisfiChat'); 
-        if (removed) removed.parentNode.removeChild(removed);
-        
-        removed = document.getElementById('transcend-consent-manager'); 
-        if (removed) removed.parentNode.removeChild(removed);
-        
-        removed = document.getElementById('termly-code-snippet-support'); 
-        if (removed) removed.parentNode.removeChild(removed);
+    return ArticleIndex(articles, covered_from, data["updated_at"])
+
+
+def update_article_index(team_name: str, index: ArticleIndex, rows: Iterator[ArticleRow],
+                         start_date: dt.date) -> ArticleIndex:
     """
+    Adds the articles posted since the index was last updated, or since start_date if the index does not reach back
+    that far, and stores the index.
+
+    The archives list articles from newest to oldest, so scanning stops at the first article older than what is
+    needed.
+
+    Args:
+        team_name: Name of the team.
+        index: The team's current article index.
+        rows: The archives page's articles, from newest to oldest.
+        start_date: Start of the requested date range.
+
+    Returns:
+        The updated index.
+    """
+    stop_date = index.newest if index.covers(start_date) else start_date
+    known_urls = {article.url for article in index.articles}
+
+    new_articles = []
+    for row in rows:
+        if (stop_date is not None) and (row.date < stop_date):
+            break
+        if row.url not in known_urls:
+            known_urls.add(row.url)
+            new_articles.append(row)
+
+    covered_from = start_date if not index.covers(start_date) else index.covered_from
+    index = ArticleIndex(sorted(index.articles + new_articles, key=lambda article: article.date, reverse=True),
+                         covered_from, time.time())
+
+    body = json.dumps({
+        "articles": [(article.date.isoformat(), article.headline, article.url) for article in index.articles],
+        "covered_from": covered_from.isoformat(),
+        "updated_at": index.updated_at,
+    })
+    put_result(team_name, "article_index", "index", body.encode(), permanent=True)
 
+    return index
+
+
+def articles_in_range(index: ArticleIndex, date_range: tuple[dt.date, dt.date]) -> DataFrame:
+    """
+    Looks up the indexed articles posted within a date range.
+
+    Args:
+        index: A team's article index.
+        date_range: Range of dates to look up.
+
+    Returns:
+        DataFrame of the articles containing the date posted, headline, and URL, from newest to oldest.
+    """
+    start_date, end_date = date_range
+    articles = [article for article in index.articles if start_date <= article.date <= end_date]
+
+    return DataFrame({
+        "Date": pd.to_datetime([article.date for article in articles]),
+        "Headline": [article.headline for article in articles],
+        "URL": [article.url for article in articles],
+    })
+
+
+@coalesced("article_pdfs", key=lambda articles: tuple(articles["URL"]))
+def download_articles(articles: DataFrame, archive: ArchiveWriter) -> None:
+    """
+    Downloads selected articles into respective PDF files.
+
+    Args:
+        articles: DataFrame of articles to download containing the date posted, headline, and URL.
+        archive: Archive to write the PDF files to.
+
+    Returns:
+        None
+    """
+    pending_articles = []
     for _, row in articles.iterrows():
         headline = row["Headline"].replace("/", "_")
         filename = f"{headline}.pdf"
 
-        try:
-            driver.get(row["URL"])
-            time.sleep(1)
+        if not cached_print_to_zipfile(row["URL"], filename, archive):
+            pending_articles.append((row["URL"], filename))
 
-            driver.execute_script(script)
+    if len(pending_articles) == 0:
+        return
 
-            print_pdf_to_zipfile(driver, filename, zip_buffer)
-        except TimeoutException as e:
-            st.write(f"**{filename}** :x:  \nReason: {e.msg}")
+    filenames = dict(pending_articles)
 
-    driver.quit()
+    with borrow_driver() as driver:
+        for url, error in load_pages_in_tabs(driver, list(filenames), "article", ARTICLE_TABS, ARTICLE_TIMEOUT):
+            if error is not None:
+                events.failed(filenames[url], f"The article could not be loaded: {error}")
+                continue
 
+            print_pdf_to_zipfile(driver, filenames[url], archive, url, "article")
 
-def scan_table_for_articles(team_data: dict, table: Tag, date_range: tuple[dt.date, dt.date]) -> DataFrame:
+
+def scan_table_for_articles(team_data: dict, table: Tag) -> Iterator[ArticleRow]:
     """
-    Scans through an HTML table and returns a DataFrame containing the date posted, headline, and URL.
+    Scans through an HTML table of articles row by row.
 
     Args:
         team_data: Dictionary containing team data.
         table: Table tag extracted from the HTML page.
-        date_range: Tuple containing start and end dates of articles to download.
 
     Returns:
-        DataFrame of articles to download containing the date posted, headline, and URL.
+        An iterator of the table's articles, in the table's order.
     """
-    start_date, end_date = date_range
-    sanitized_table = sanitize_html(table)
+    header_row = table.find("thead") or table.find("tr")
+    headers = [th.get_text(strip=True) for th in header_row.find_all("th")]
+    date_format = '%m/%d/%Y' if "Posted" in headers else '%B %d, %Y'
+    date_column = headers.index("Posted" if "Posted" in headers else "Date")
+    headline_column = headers.index("Title" if "Title" in headers else "Headline")
 
-    links = [f"{team_data['base_url']}{a['href']}" for a in table.find_all("a") if (a["href"] != "#")]
+    for table_row in (table.find("tbody") or table).find_all("tr"):
+        if ("class" in table_row.attrs) and ("s-table-body__row--ad" in table_row["class"]):
+            continue
 
-    dataframe = pd.read_html(StringIO(sanitized_table))[0].drop(columns=["Sport", "Category"], errors="ignore")
-    dataframe.drop(dataframe.columns[dataframe.columns.str.contains('Unnamed', case=False)], axis=1, inplace=True)
-    dataframe["URL"] = links
+        cells = table_row.find_all("td")
+        anchor = table_row.find("a", href=lambda href: href and (href != "#"))
+        if (len(cells) <= max(date_column, headline_column)) or (anchor is None):
+            continue
 
-    if "Posted" in dataframe.columns:
-        dataframe["Date"] = pd.to_datetime(dataframe["Posted"], format='%m/%d/%Y')
-        dataframe.drop(columns=["Posted"], inplace=True)
-    elif "Date" in dataframe.columns:
-        dataframe["Date"] = pd.to_datetime(dataframe["Date"], format='%B %d, %Y')
+        date = dt.datetime.strptime(" ".join(cells[date_column].get_text().split()), date_format).date()
+        headline = " ".join(cells[headline_column].get_text().split())
 
-    if "Title" in dataframe.columns:
-        dataframe.rename(columns={"Title": "Headline"}, inplace=True)
+        yield ArticleRow(date, headline, f"{team_data['base_url']}{anchor['href']}")
 
-    return dataframe[(dataframe["Date"].dt.date >= start_date) & (dataframe["Date"].dt.date <= end_date)]
 
-
-def scan_ul_for_articles(team_data: dict, ul: Tag, date_range: tuple[dt.date, dt.date]) -> DataFrame:
+def scan_ul_for_articles(team_data: dict, ul: Tag) -> Iterator[ArticleRow]:
     """
-    Scans through an HTML list and returns a DataFrame containing the date posted, headline, and URL.
+    Scans through an HTML list of articles item by item.
 
     Args:
         team_data: Dictionary containing team data.
         ul: Ul tag extracted from the HTML page.
-        date_range: Tuple containing start and end dates of articles to download.
 
     Returns:
-        DataFrame of articles to download containing the date posted, headline, and URL.
+        An iterator of the list's articles, in the list's order.
     """
-    start_date, end_date = date_range
     sanitized_ul = sanitize_html(ul)
     sanitized_ul = BeautifulSoup(sanitized_ul, "lxml")
 
-    articles_list = []
     for li in sanitized_ul.find_all("li", class_="vue-archives-item flex"):
         span = li.find("div", class_="vue-archives-item--metadata").find("span")
         date_string = span.text.replace("Date: ", "")
         date = dt.datetime.strptime(date_string, '%B %d, %Y').date()
 
-        if start_date <= date <= end_date:
-            a = li.find("a")
-            articles_list.append({"Date": date, "Headline": a.text, "URL": f"{team_data['base_url']}{a['href']}"})
-
-    return DataFrame(articles_list)
+        a = li.find("a")
+        yield ArticleRow(date, a.text, f"{team_data['base_url']}{a['href']}")
@@ -0,0 +1,246 @@
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import events
+from archive import ArchiveWriter
+from articles import download_articles
+from cache import get_page_cache
+from config import SCRAPE_WORKERS
+from fetch import get_served_by_counts
+from pages import get_page_load_stats
+from ratelimit import get_host_limit_stats
+from resilience import get_breaker_stats
+from scrape import ARTIFACTS, JobOutcome, build_jobs, run_jobs
+from stats import current_season
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_OPTIONS = {artifact.lower().replace(" ", "_"): artifact for artifact in ARTIFACTS}
+
+
+class TeamSummary(NamedTuple):
+    team_name: str
+    outcomes: list[JobOutcome]
+    events: list[events.ScrapeEvent]
+    filenames: list[str]
+    elapsed: float
+
+
+def scrape_team(team_data: dict, artifacts: list[str], years: list[str], count: int,
+                date_range: tuple[dt.date, dt.date], output_dir: str, output_format: str) -> TeamSummary:
+    """
+    Scrapes the selected artifacts of one team and writes them to the output directory.
+
+    Args:
+        team_data: Dictionary containing team data.
+        artifacts: Artifacts to scrape, a subset of ARTIFACTS.
+        years: Years to download stats for.
+        count: Number of box scores to download.
+        date_range: Range of dates to download articles from. Every article in the range is downloaded.
+        output_dir: Directory the team's archive or directory is written to.
+        output_format: "zip" to write one archive per team, "dir" to write one directory of PDFs per team.
+
+    Returns:
+        The team's job outcomes, the events its jobs emitted, the files that were written and the total time taken.
+    """
+    start = time.perf_counter()
+    archive = ArchiveWriter()
+    outcomes = []
+    team_events = []
+
+    jobs = build_jobs(team_data, artifacts, archive, years, count, date_range)
+    for update in run_jobs(jobs, SCRAPE_WORKERS):
+        if isinstance(update, events.ScrapeEvent):
+            team_events.append(update)
+            continue
+
+        outcome = update
+        if (outcome.name == "Articles") and (outcome.error is None) and (outcome.result is not None):
+            download_start = time.perf_counter()
+            try:
+                with events.capture(team_events.append):
+                    download_articles(outcome.result, archive)
+                outcome = outcome._replace(elapsed=outcome.elapsed + time.perf_counter() - download_start)
+            except Exception as e:
+                logger.exception("Downloading %s articles failed", team_data["name"])
+                outcome = outcome._replace(error=e, elapsed=outcome.elapsed + time.perf_counter() - download_start)
+
+        outcomes.append(outcome)
+
+    filenames = archive.namelist()
+    write_output(archive, team_data["name"], output_dir, output_format)
+    archive.close()
+
+    return TeamSummary(team_data["name"], outcomes, team_events, filenames, time.perf_counter() - start)
+
+
+def write_output(archive: ArchiveWriter, team_name: str, output_dir: str, output_format: str) -> None:
+    """
+    Writes a team's archive to disk.
+
+    Args:
+        archive: The team's archive.
+        team_name: Name of the team.
+        output_dir: Directory to write to.
+        output_format: "zip" to write "<team>.zip", "dir" to extract the PDFs into "<team>/".
+
+    Returns:
+        None
+    """
+    reader = archive.download_file()
+
+    if output_format == "zip":
+        with open(os.path.join(output_dir, f"{team_name}.zip"), "wb") as file:
+            shutil.copyfileobj(reader, file)
+    else:
+        with zipfile.ZipFile(reader) as zip_file:
+            zip_file.extractall(os.path.join(output_dir, team_name))
+
+
+def print_summary(summaries: list[TeamSummary]) -> None:
+    """
+    Prints the timings and failures of every team and artifact, followed by every file that could not be scraped, what
+    the browser's page loads cost on average, which path served the pages, how often the page cache was hit, which
+    hosts asked to be sent fewer requests and the circuit breaker of every host that failed.
+
+    Args:
+        summaries: The teams' summaries.
+
+    Returns:
+        None
+    """
+    for summary in sorted(summaries, key=lambda item: item.team_name):
+        print(f"{summary.team_name}: {len(summary.filenames)} file(s) in {summary.elapsed:.1f}s")
+
+        for outcome in sorted(summary.outcomes, key=lambda item: ARTIFACTS.index(item.name)):
+            status = "ok" if outcome.error is None else f"FAILED: {outcome.error}"
+            print(f"    {outcome.name:<12} {outcome.elapsed:6.1f}s  {status}")
+
+        for event in summary.events:
+            if not event.ok:
+                print(f"    FAILED {event.item}: {event.reason}")
+
+    page_loads = get_page_load_stats()
+    if page_loads:
+        print("Browser page loads (average per page, of what still loaded):")
+        for page_kind, stats in sorted(page_loads.items()):
+            print(f"    {page_kind:<26} {stats.pages:4d} page(s)  {stats.bytes / stats.pages / 1024:8.0f} KiB  "
+                  f"{stats.requests / stats.pages:5.0f} requests  {stats.seconds / stats.pages:5.2f}s  "
+                  f"{stats.blocked / stats.pages:5.0f} blocked")
+
+    served_by = get_served_by_counts()
+    if served_by:
+        print("Pages served by (http, cache or browser):")
+        for page_kind in sorted({page_kind for page_kind, _ in served_by}):
+            print(f"    {page_kind:<26} " + ", ".join(f"{served_by.get((page_kind, path), 0)} {path}"
+                                                    for path in ("http", "cache", "browser")))
+
+    cache_counts = get_page_cache().stats()
+    if cache_counts:
+        print("Page cache: " + ", ".join(f"{cache_counts.get(counter, 0)} {counter}"
+                                         for counter in ("hits", "misses", "revalidations", "evictions")))
+
+    throttled_hosts = {host: stats for host, stats in get_host_limit_stats().items() if stats.throttles}
+    if throttled_hosts:
+        print("Throttled hosts (429/503 responses):")
+        for host, stats in sorted(throttled_hosts.items()):
+            print(f"    {host:<32} {stats.throttles:4d} time(s)  now at {stats.rate:.2f} requests/s")
+
+    failing_hosts = {host: stats for host, stats in get_breaker_stats().items() if stats.failures}
+    if failing_hosts:
+        print("Failing hosts (timeouts, connection errors, 429 and 5xx):")
+        for host, stats in sorted(failing_hosts.items()):
+            state = f"circuit {stats.state.replace('_', '-')}"
+            if stats.state == "open":
+                state += f" for {stats.retry_in:.0f}s"
+            print(f"    {host:<32} {stats.failures:4d} failure(s)  opened {stats.trips} time(s), {state}")
+
+
+def parse_args(argv: list[str], teams: dict) -> argparse.Namespace:
+    """
+    Parses the command line.
+
+    Args:
+        argv: Command line arguments, without the program name.
+        teams: Dictionary of team data loaded from teams.json.
+
+    Returns:
+        The parsed arguments.
+    """
+    today = dt.date.today()
+    season_year = current_season(today)
+
+    parser = argparse.ArgumentParser(description="Scrape teams from teams.json without the Streamlit app.")
+    parser.add_argument("--teams", nargs="+", choices=list(teams.keys()), default=list(teams.keys()),
+                        metavar="TEAM", help="Teams to scrape. Defaults to every team in teams.json.")
+    parser.add_argument("--artifacts", nargs="+", choices=list(ARTIFACT_OPTIONS.keys()),
+                        default=list(ARTIFACT_OPTIONS.keys()), help="Artifacts to scrape. Defaults to all of them.")
+    parser.add_argument("--years", nargs="+", default=[str(season_year), str(season_year - 1)],
+                        help="Years to download stats for. Defaults to the current and previous season.")
+    parser.add_argument("--count", type=int, default=5, help="Number of box scores to download (default: 5).")
+    parser.add_argument("--start", type=dt.date.fromisoformat, default=dt.date(season_year, 8, 1),
+                        help="First day of the article date range, as YYYY-MM-DD. Defaults to August 1st of "
+                             "the current season.")
+    parser.add_argument("--end", type=dt.date.fromisoformat, default=today,
+                        help="Last day of the article date range, as YYYY-MM-DD. Defaults to today.")
+    parser.add_argument("--output-dir", default="output", help="Directory to write to (default: output).")
+    parser.add_argument("--format", choices=["zip", "dir"], default="zip", dest="output_format",
+                        help="Write one zip archive or one directory of PDFs per team (default: zip).")
+    parser.add_argument("--workers", type=int, default=4, help="Number of teams scraped at once (default: 4).")
+
+    args = parser.parse_args(argv)
+
+    if args.count < 1:
+        parser.error("--count must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    return args
+
+
+def main(argv: list[str]) -> int:
+    """
+    Scrapes every selected team and prints a summary.
+
+    Args:
+        argv: Command line arguments, without the program name.
+
+    Returns:
+        The process exit code: 0 if every job and file succeeded, 1 otherwise.
+    """
+    logging.basicConfig(level=logging.INFO)
+
+    with open("teams.json", "r") as file:
+        teams: dict = json.load(file)
+
+    args = parse_args(argv, teams)
+    artifacts = [ARTIFACT_OPTIONS[artifact] for artifact in args.artifacts]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(scrape_team, teams[team_name], artifacts, args.years, args.count, (args.start, args.end),
+                            args.output_dir, args.output_format)
+            for team_name in args.teams
+        ]
+        summaries = [future.result() for future in futures]
+
+    print_summary(summaries)
+
+    failed = any(outcome.error is not None for summary in summaries for outcome in summary.outcomes)
+    failed = failed or any(not event.ok for summary in summaries for event in summary.events)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
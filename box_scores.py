@@ -1,211 +1,170 @@
-import time
-from io import BytesIO
+import contextvars
+import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 
-import streamlit as st
-from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.common import TimeoutException, ElementNotVisibleException, WebDriverException
 
-from utils import initialize_web_driver, response_pdf_to_zipfile
+import events
+from archive import ArchiveWriter
+from cache import get_page_cache, put_result
+from coalesce import coalesced
+from conference import get_conference_box_scores
+from config import BOX_SCORE_WORKERS, RESULT_TTL
+from fetch import fetch_page, get_fetch_strategy
+from utils import cached_result_to_zipfile, download_pdfs_to_zipfile
 
 
-def download_box_scores(team_data: dict, count: int, zip_buffer: BytesIO) -> None:
+@coalesced("box_scores")
+def download_box_scores(team_data: dict, count: int, archive: ArchiveWriter) -> None:
     """Downloads box scores into respective PDF files.
 
     Args:
         team_data: Dictionary containing team data.
         count: The number of box scores to print.
-        zip_buffer: Bytes buffer containing box scores.
+        archive: Archive to write the PDF files to.
 
     Returns:
         None
     """
-    driver = initialize_web_driver()
+    strategy = get_fetch_strategy(team_data, "box_scores")
+    final_filenames: set[str] = set()
 
-    try:
-        if team_data["conference_schedule_provider"] == "Boost":
-            schedule_url = f"{team_data['conference_base_url']}/msoc/schedule/?teamFilter={team_data['abbreviation']}"
-
-            driver.get(schedule_url)
-            time.sleep(1)
-            doc = BeautifulSoup(driver.page_source, "lxml")
+    def store_result(filename: str, pdf_bytes: bytes) -> None:
+        # A box score is linked while its match is still being played, so only final matches' are kept for good.
+        put_result(team_data["name"], "box_scores", filename, pdf_bytes, permanent=filename in final_filenames)
 
-            box_score_pdf_urls = get_boost_box_score_pdf_urls(doc, team_data["abbreviation"], count)
+    try:
+        box_scores = get_conference_box_scores(team_data, strategy)[-count:]
 
-            for box_score_pdf_url in box_score_pdf_urls:
+        if team_data["conference_schedule_provider"] == "Boost":
+            pdf_requests = []
+            for box_score_pdf_url in box_scores:
                 filename = box_score_pdf_url.split("/")[-1]
 
-                response_pdf_to_zipfile(box_score_pdf_url, filename, zip_buffer)
+                if not cached_result_to_zipfile(team_data["name"], "box_scores", filename, filename, archive):
+                    pdf_requests.append((box_score_pdf_url, filename))
+
+            download_pdfs_to_zipfile(pdf_requests, archive, "box_scores", store_result)
         elif team_data["conference_schedule_provider"] == "Sidearm":
-            schedule_url = f"{team_data['conference_base_url']}/calendar.aspx?path=msoc"
+            matches = []
+            for match in box_scores:
+                filename = box_score_filename(match)
+                if is_final_match(match[2]):
+                    final_filenames.add(filename)
 
-            driver.get(schedule_url)
-            time.sleep(1)
-            doc = BeautifulSoup(driver.page_source, "lxml")
+                if not cached_result_to_zipfile(team_data["name"], "box_scores", filename, filename, archive):
+                    matches.append(match)
 
-            box_score_pdf_urls = get_sidearm_match_data(driver, team_data, doc, count)
+            if matches:
+                box_score_pdf_urls = fetch_pdf_urls_for_matches(matches, team_data, strategy)
 
-            for home_team, away_team, date, box_score_pdf_url in box_score_pdf_urls:
-                filename = f"{home_team} vs {away_team} {date}.pdf"
+                pdf_requests = [(match[3], box_score_filename(match)) for match in box_score_pdf_urls]
 
-                response_pdf_to_zipfile(box_score_pdf_url, filename, zip_buffer)
+                download_pdfs_to_zipfile(pdf_requests, archive, "box_scores", store_result)
     except TimeoutException as e:
-        st.write(e)
+        events.failed("Locating Box Scores", e.msg)
     except WebDriverException as e:
-        st.write(f"**Locating Box Scores** :x:  \nReason: {e.msg}")
-    finally:
-        driver.quit()
+        events.failed("Locating Box Scores", e.msg)
 
 
-def get_boost_box_score_pdf_urls(doc: BeautifulSoup, team_abbreviation: str, count: int) -> list[str]:
+def box_score_filename(match: tuple[str, str, str, str]) -> str:
     """
-    Get the URLs of the box scores from the conference websites provided by Boost.
+    Builds the filename of a Sidearm match's box score.
 
     Args:
-        doc: The BeautifulSoup object containing the parsed HTML.
-        team_abbreviation: The abbreviation of the team for which to get the box scores.
-        count: The number of box scores to print.
+        match: Match data represented as a tuple of the form (home_team, away_team, date, url).
 
     Returns:
-        List of box score PDF URLs.
-    """
-    box_score_pdf_urls = []
-    schedule_table = doc.find("table")
-    for table_row in schedule_table.find("tbody").find_all("tr"):
-        table_cells = table_row.find_all("td")
-
-        if (team_abbreviation != table_cells[2].text) and (team_abbreviation != table_cells[4].text):
-            continue
-
-        anchor = table_row.find("a", string="Box Score")
-        if anchor:
-            box_score_pdf_urls.append(anchor["href"])
-
-    count = min(len(box_score_pdf_urls), count)
-    return box_score_pdf_urls[-count:]
-
-
-def get_sidearm_match_data(driver: webdriver.Chrome, team_data: dict, doc: BeautifulSoup, count: int) -> list[
-    tuple[str, str, str, str]]:
+        The filename of the box score PDF.
     """
-    Get the URLs of the box scores from the conference websites provided by Sidearm.
+    home_team, away_team, date, _ = match
+    return f"{home_team} vs {away_team} {date}.pdf"
 
-    Args:
-        driver: The WebDriver.
-        team_data: Dictionary containing team data.
-        doc: The BeautifulSoup object containing the parsed HTML.
-        count: The number of box scores to print.
 
-    Returns:
-        List of match data represented as a tuple of the form (home_team, away_team, date, box_score_pdf_url).
+def is_final_match(date: str) -> bool:
     """
-    match_tables = doc.find_all("table")
-    matches = extract_matches(team_data, match_tables)
-
-    return fetch_pdf_urls_for_matches(driver, matches, team_data, count)
-
-
-def extract_matches(team_data: dict, match_tables: list) -> list[tuple[str, str, str, str]]:
-    """Extract matches from the match tables.
+    Checks whether a match is over, meaning its box score can no longer change.
 
     Args:
-        team_data: Dictionary containing team data.
-        match_tables: List of match table elements.
+        date: The match's date as stored in its match data, ie: "10_5_2024".
 
     Returns:
-        List of match data represented as a tuple of the form (home_team, away_team, date, box_score_url).
+        True if the match was played before today. Dates that cannot be read count as not final.
     """
-    matches = []
-    for match_table in match_tables:
-        match_table_body = match_table.find("tbody")
-
-        for tr in match_table_body.find_all("tr"):
-            away_team = get_team_name(tr, 'sidearm-team-away')
-            home_team = get_team_name(tr, 'sidearm-team-home')
-
-            if (away_team != team_data["name"]) and (home_team != team_data["name"]):
-                continue
-
-            date = extract_match_date(match_table)
-
-            anchor = tr.find("a", string="Box Score")
-            if anchor:
-                box_score_href = team_data["conference_base_url"] + anchor["href"]
-                matches.append((home_team, away_team, date, box_score_href))
-
-    return matches
+    try:
+        return dt.datetime.strptime(date.strip(), "%m_%d_%Y").date() < dt.date.today()
+    except ValueError:
+        return False
 
 
-def get_team_name(table_row: BeautifulSoup, team_class: str) -> str:
+def fetch_pdf_urls_for_matches(matches: list[tuple[str, str, str, str]], team_data: dict,
+                               strategy: str) -> list[tuple[str, str, str, str]]:
     """
-    Extract the team name from a table row.
+    Resolves the PDF URLs of the given matches' box scores in parallel.
 
     Args:
-        table_row: Table row element containing team data.
-        team_class: Class name to identify the team.
+        matches: List of matches containing details.
+        team_data: Dictionary containing team data.
+        strategy: "http" or "browser", as returned by get_fetch_strategy.
 
     Returns:
-        Extracted team name.
+        List of match data represented as a tuple of the form (home_team, away_team, date, box_score_pdf_url), in the
+        order of the given matches. Matches whose PDF could not be found are reported and left out.
     """
-    team_td = table_row.select_one(f'td[class*="{team_class}"]')
-    return team_td.find("span", class_="sidearm-calendar-list-group-list-game-team-title").find(['a', 'span']).text
-
+    match_data = []
 
-def extract_match_date(match_table: BeautifulSoup) -> str:
-    """
-    Extract the match date from the match table caption.
+    with ThreadPoolExecutor(max_workers=min(BOX_SCORE_WORKERS, len(matches))) as executor:
+        # Each worker runs in a copy of this thread's context, so that the scrape's deadline applies to it.
+        futures = [executor.submit(contextvars.copy_context().run, resolve_box_score_pdf_url, match, team_data,
+                                   strategy) for match in matches]
 
-    Args:
-        match_table: Match table element.
+        for match, future in zip(matches, futures):
+            try:
+                match_data.append((match[0], match[1], match[2], future.result()))
+            except WebDriverException as e:
+                events.failed(box_score_filename(match), e.msg)
 
-    Returns:
-        Extracted match date.
-    """
-    match_table_caption = match_table.find("caption")
-    return match_table_caption.find("span",
-                                    class_="hide-on-medium sidearm-calendar-list-group-heading-date").text.replace("/",
-                                                                                                                   "_")
+    return match_data
 
 
-def fetch_pdf_urls_for_matches(driver: webdriver.Chrome, matches: list[tuple[str, str, str, str]],
-                               team_data: dict, count: int) -> list[tuple[str, str, str, str]]:
+def resolve_box_score_pdf_url(match: tuple[str, str, str, str], team_data: dict, strategy: str) -> str:
     """
-    Fetch the PDF URLs for box scores for the given matches.
+    Follows a Sidearm box score page to its print preview and returns the PDF URL embedded there. Resolved URLs are
+    remembered by box score URL alone, so that both teams of a match share them, permanently once the match is final
+    and for NU_SCRAPER_RESULT_TTL seconds before.
 
     Args:
-        driver: The web driver instance.
-        matches: List of matches containing details.
+        match: Match data represented as a tuple of the form (home_team, away_team, date, box_score_url).
         team_data: Dictionary containing team data.
-        count: The number of box scores to fetch.
+        strategy: "http" or "browser", as returned by get_fetch_strategy.
 
     Returns:
-        List of match data represented as a tuple of the form (home_team, away_team, date, box_score_pdf_url).
+        The URL of the box score PDF.
+
+    Raises:
+        ElementNotVisibleException: If the box score page has no print preview.
+        WebDriverException: If a page could not be loaded in the browser.
     """
-    match_data = []
+    box_score_url = match[3]
 
-    for match in matches[-count:]:
-        try:
-            driver.get(match[3])
-            time.sleep(1)
+    cached_pdf_url = get_page_cache().get(box_score_url, "pdf_url")
+    if cached_pdf_url is not None:
+        return cached_pdf_url.decode()
 
-            doc = BeautifulSoup(driver.page_source, "lxml")
-            print_bar = doc.find("div", id="print-bar")
-            if print_bar:
-                box_score_preview_url = team_data["conference_base_url"] + print_bar.find("a")["href"]
-            else:
-                raise ElementNotVisibleException(
-                    f"No box score PDF available for {match[0]} vs. {match[1]} on {match[2]}")
+    doc = fetch_page(box_score_url, "sidearm_box_score", strategy).doc
+    print_bar = doc.find("div", id="print-bar")
+    if not print_bar:
+        raise ElementNotVisibleException(f"No box score PDF available for {match[0]} vs. {match[1]} on {match[2]}")
 
-            driver.get(box_score_preview_url)
-            time.sleep(1)
+    box_score_preview_url = team_data["conference_base_url"] + print_bar.find("a")["href"]
 
-            doc = BeautifulSoup(driver.page_source, "lxml")
-            box_score_pdf_url = doc.find("object")["data"]
+    doc = fetch_page(box_score_preview_url, "sidearm_box_score_preview", strategy).doc
+    box_score_object = doc.find("object")
+    if not box_score_object:
+        raise ElementNotVisibleException(f"No box score PDF available for {match[0]} vs. {match[1]} on {match[2]}")
 
-            match_data.append((match[0], match[1], match[2], box_score_pdf_url))
-        except TimeoutException as e:
-            st.write(f"**{match[0]} vs. {match[1]} {match[2]}.pdf** :x:  \nReason: {e.msg}")
-        except ElementNotVisibleException as e:
-            st.write(f"**{match[0]} vs. {match[1]} {match[2]}.pdf** :x:  \nReason: {e.msg}")
+    box_score_pdf_url = box_score_object["data"]
+    get_page_cache().put(box_score_url, "pdf_url", box_score_pdf_url.encode(),
+                         None if is_final_match(match[2]) else RESULT_TTL)
 
-    return match_data
+    return box_score_pdf_url
@@ -0,0 +1,484 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import IO, Iterator, NamedTuple
+
+from config import CACHE_DIR, CACHE_MAX_BYTES, RESULT_TTL
+
+
+class CacheEntry(NamedTuple):
+    url: str
+    mode: str
+    content_hash: str
+    size: int
+    stored_at: float
+    expires_at: float | None
+    last_access: float
+    etag: str | None = None
+    last_modified: str | None = None
+    content_type: str | None = None
+
+    @property
+    def fresh(self) -> bool:
+        return (self.expires_at is None) or (time.time() < self.expires_at)
+
+
+class BodyWriter:
+    """
+    Writable body of a cache entry that is being streamed in.
+    """
+
+    def __init__(self, file: IO[bytes]) -> None:
+        self.size = 0
+
+        self._file = file
+        self._hash = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        """
+        Appends data to the body.
+
+        Args:
+            data: The bytes to append.
+
+        Returns:
+            The number of bytes written.
+        """
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def hexdigest(self) -> str:
+        """
+        Returns the SHA-256 of the body written so far.
+
+        Returns:
+            The hex digest.
+        """
+        return self._hash.hexdigest()
+
+
+class PageCache:
+    """
+    Persistent, content-addressed cache of fetched pages and PDFs.
+
+    Entries are keyed by URL plus fetch mode ("http" for raw responses, "dom" for rendered page sources, "pdf" for
+    printed pages, "pdf_url" for the PDF a box score page links to) and point at a body stored under the SHA-256 of its
+    contents, so identical documents are stored once. The least recently used entries are evicted when the bodies
+    outgrow the size cap.
+
+    The entries' metadata is indexed in memory, loaded from disk on first use, so that storing a body only costs a scan
+    of the index when the cap is exceeded. Entries written by other processes (ie: warmup.py) join the index as soon as
+    they are looked up.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        """
+        Initializes a cache rooted at a directory, creating it if needed.
+
+        Args:
+            directory: Directory the cache is stored in.
+            max_bytes: Maximum total size of the cached bodies.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self._objects_dir = os.path.join(directory, "objects")
+        self._entries_dir = os.path.join(directory, "entries")
+        self._lock = threading.RLock()
+        self._counts: Counter = Counter()
+
+        self._index: dict[str, CacheEntry] | None = None
+        self._references: Counter = Counter()
+        self._sizes: dict[str, int] = {}
+        self._total = 0
+
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._entries_dir, exist_ok=True)
+
+    def get(self, url: str, mode: str) -> bytes | None:
+        """
+        Returns the body of a fresh entry, counting a hit or a miss.
+
+        Args:
+            url: URL the body was fetched from.
+            mode: Fetch mode, ie: "http", "dom" or "pdf".
+
+        Returns:
+            The cached body, or None if there is no fresh entry.
+        """
+        entry = self.lookup(url, mode)
+        body = self.read(entry) if (entry is not None) and entry.fresh else None
+
+        self.record("hits" if body is not None else "misses")
+        return body
+
+    def lookup(self, url: str, mode: str) -> CacheEntry | None:
+        """
+        Looks up an entry's metadata, whether or not it is still fresh.
+
+        Args:
+            url: URL the body was fetched from.
+            mode: Fetch mode, ie: "http", "dom" or "pdf".
+
+        Returns:
+            The cache entry, or None if there is none.
+        """
+        path = self._entry_path(url, mode)
+
+        # The entry file is still read, since another process may have replaced it.
+        try:
+            with open(path, "r") as file:
+                stored = CacheEntry(**json.load(file))
+        except (FileNotFoundError, ValueError, TypeError):
+            stored = None
+
+        with self._lock:
+            index = self._load_index()
+            known = index.get(path)
+
+            if stored is None:
+                if known is not None:
+                    self._forget(path)
+                return None
+
+            if (known is not None) and (known.content_hash == stored.content_hash) and \
+                    (known.stored_at == stored.stored_at):
+                # Accesses are only recorded in memory, so the indexed entry is the most recently used one.
+                return stored._replace(last_access=max(known.last_access, stored.last_access))
+
+            self._index_entry(path, stored)
+            return stored
+
+    def read(self, entry: CacheEntry) -> bytes | None:
+        """
+        Reads an entry's body and marks the entry as recently used.
+
+        Args:
+            entry: The cache entry.
+
+        Returns:
+            The cached body, or None if it has been evicted in the meantime.
+        """
+        try:
+            with open(self._object_path(entry.content_hash), "rb") as file:
+                body = file.read()
+        except FileNotFoundError:
+            return None
+
+        self._touch(entry)
+        return body
+
+    def put(self, url: str, mode: str, body: bytes, ttl: float | None, etag: str | None = None,
+            last_modified: str | None = None, content_type: str | None = None) -> CacheEntry:
+        """
+        Stores a body, replacing any previous entry for the same URL and mode.
+
+        Args:
+            url: URL the body was fetched from.
+            mode: Fetch mode, ie: "http", "dom" or "pdf".
+            body: The fetched bytes.
+            ttl: Seconds the entry stays fresh, or None if it never expires.
+            etag: ETag response header, used to revalidate the entry once it is stale.
+            last_modified: Last-Modified response header, used to revalidate the entry once it is stale.
+            content_type: Content-Type response header.
+
+        Returns:
+            The new cache entry.
+        """
+        content_hash = hashlib.sha256(body).hexdigest()
+        object_path = self._object_path(content_hash)
+
+        now = time.time()
+        entry = CacheEntry(url, mode, content_hash, len(body), now, None if ttl is None else now + ttl, now, etag,
+                           last_modified, content_type)
+
+        with self._lock:
+            if not os.path.exists(object_path):
+                _atomic_write(object_path, body)
+
+            self._store_entry(entry)
+
+        return entry
+
+    @contextmanager
+    def open_put(self, url: str, mode: str, ttl: float | None,
+                 content_type: str | None = None) -> Iterator[BodyWriter]:
+        """
+        Stores a body that is written incrementally, so that it never has to be held in memory whole. The body is
+        staged in a temporary file and only replaces the previous entry for the same URL and mode once the context
+        manager exits without an error.
+
+        Args:
+            url: URL the body was fetched from.
+            mode: Fetch mode, ie: "http", "dom" or "pdf".
+            ttl: Seconds the entry stays fresh, or None if it never expires.
+            content_type: Content-Type of the body.
+
+        Returns:
+            A context manager yielding the body's writer.
+        """
+        descriptor, temp_path = tempfile.mkstemp(dir=self._objects_dir, prefix=".tmp-")
+
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                writer = BodyWriter(file)
+                yield writer
+
+            content_hash = writer.hexdigest()
+            now = time.time()
+            entry = CacheEntry(url, mode, content_hash, writer.size, now, None if ttl is None else now + ttl, now,
+                               content_type=content_type)
+
+            with self._lock:
+                object_path = self._object_path(content_hash)
+                if os.path.exists(object_path):
+                    _remove(temp_path)
+                else:
+                    os.replace(temp_path, object_path)
+
+                self._store_entry(entry)
+        except BaseException:
+            _remove(temp_path)
+            raise
+
+    def refresh(self, entry: CacheEntry, ttl: float | None) -> CacheEntry:
+        """
+        Extends an entry's freshness after the upstream confirmed it has not changed.
+
+        Args:
+            entry: The cache entry.
+            ttl: Seconds the entry stays fresh from now, or None if it never expires.
+
+        Returns:
+            The refreshed cache entry.
+        """
+        now = time.time()
+        entry = entry._replace(expires_at=None if ttl is None else now + ttl, last_access=now)
+
+        with self._lock:
+            self._write_entry(entry)
+            self._index_entry(self._entry_path(entry.url, entry.mode), entry)
+
+        return entry
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cached bodies fit within the size cap. Permanent entries are
+        evicted last.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            index = self._load_index()
+            if self._total <= self.max_bytes:
+                return
+
+            # Entries that never expire are only evicted once every expiring entry is gone.
+            for path, entry in sorted(index.items(), key=lambda item: (item[1].expires_at is None,
+                                                                       item[1].last_access)):
+                if self._total <= self.max_bytes:
+                    break
+
+                _remove(path)
+                self._forget(path)
+                self.record("evictions")
+
+    def record(self, event: str) -> None:
+        """
+        Increments one of the cache's counters.
+
+        Args:
+            event: Name of the counter, ie: "hits", "misses", "revalidations" or "evictions".
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._counts[event] += 1
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns the cache's counters since the process started.
+
+        Returns:
+            Mapping of counter name to count.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def _load_index(self) -> dict[str, CacheEntry]:
+        # Called with the lock held. Bodies no entry points at anymore are removed while the index is built. Recent
+        # files are skipped because another process may be about to write the entry that points at them.
+        if self._index is not None:
+            return self._index
+
+        self._index = {}
+        for name in os.listdir(self._entries_dir):
+            if not name.endswith(".json"):
+                continue
+
+            path = os.path.join(self._entries_dir, name)
+            try:
+                with open(path, "r") as file:
+                    self._index_entry(path, CacheEntry(**json.load(file)))
+            except (FileNotFoundError, ValueError, TypeError):
+                continue
+
+        for name in os.listdir(self._objects_dir):
+            path = os.path.join(self._objects_dir, name)
+            if (name not in self._references) and (not name.startswith(".tmp-")) and _older_than(path, 60):
+                _remove(path)
+
+        return self._index
+
+    def _store_entry(self, entry: CacheEntry) -> None:
+        # Called with the lock held.
+        self._write_entry(entry)
+        self._index_entry(self._entry_path(entry.url, entry.mode), entry)
+
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def _index_entry(self, path: str, entry: CacheEntry) -> None:
+        # Called with the lock held.
+        index = self._load_index()
+
+        # The new body is referenced before the replaced entry is forgotten, so that a body they share is kept.
+        if self._references[entry.content_hash] == 0:
+            self._sizes[entry.content_hash] = entry.size
+            self._total += entry.size
+        self._references[entry.content_hash] += 1
+
+        if path in index:
+            self._forget(path)
+        index[path] = entry
+
+    def _forget(self, path: str) -> None:
+        # Called with the lock held. Removes an entry from the index, and its body once no entry points at it.
+        entry = self._index.pop(path)
+
+        self._references[entry.content_hash] -= 1
+        if self._references[entry.content_hash] == 0:
+            del self._references[entry.content_hash]
+            self._total -= self._sizes.pop(entry.content_hash)
+            _remove(self._object_path(entry.content_hash))
+
+    def _touch(self, entry: CacheEntry) -> None:
+        with self._lock:
+            path = self._entry_path(entry.url, entry.mode)
+            known = self._load_index().get(path)
+
+            if (known is not None) and (known.content_hash == entry.content_hash):
+                self._index[path] = known._replace(last_access=time.time())
+
+    def _entry_path(self, url: str, mode: str) -> str:
+        key = hashlib.sha256(f"{mode}\n{url}".encode()).hexdigest()
+        return os.path.join(self._entries_dir, f"{key}.json")
+
+    def _object_path(self, content_hash: str) -> str:
+        return os.path.join(self._objects_dir, content_hash)
+
+    def _write_entry(self, entry: CacheEntry) -> None:
+        _atomic_write(self._entry_path(entry.url, entry.mode), json.dumps(entry._asdict()).encode())
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path)
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+
+
+def _older_than(path: str, seconds: float) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) > seconds
+    except FileNotFoundError:
+        return False
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+_cache: PageCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    """
+    Returns the process-wide page cache, creating its directory on first use.
+
+    Returns:
+        The shared page cache.
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(CACHE_DIR, CACHE_MAX_BYTES)
+
+    return _cache
+
+
+def get_result(team_name: str, artifact: str, key: str) -> bytes | None:
+    """
+    Looks up a finished artifact, such as one season's stats PDF or one match's box score.
+
+    Args:
+        team_name: Name of the team.
+        artifact: Name of the artifact, ie: "stats" or "box_scores".
+        key: Identifies the result within the artifact, ie: the year or the match.
+
+    Returns:
+        The cached result, or None if there is no fresh one.
+    """
+    return get_page_cache().get(result_url(team_name, artifact, key), "result")
+
+
+def put_result(team_name: str, artifact: str, key: str, body: bytes, permanent: bool) -> None:
+    """
+    Stores a finished artifact.
+
+    Args:
+        team_name: Name of the team.
+        artifact: Name of the artifact, ie: "stats" or "box_scores".
+        key: Identifies the result within the artifact, ie: the year or the match.
+        body: The result's bytes.
+        permanent: Whether the result can never change, ie: a completed season's stats or a final box score.
+            Other results expire after NU_SCRAPER_RESULT_TTL seconds.
+
+    Returns:
+        None
+    """
+    get_page_cache().put(result_url(team_name, artifact, key), "result", body, None if permanent else RESULT_TTL)
+
+
+def result_url(team_name: str, artifact: str, key: str) -> str:
+    """
+    Builds the cache key of a finished artifact.
+
+    Args:
+        team_name: Name of the team.
+        artifact: Name of the artifact.
+        key: Identifies the result within the artifact.
+
+    Returns:
+        A URL-like key that cannot collide with fetched URLs.
+    """
+    return f"result:{team_name}/{artifact}/{key}"
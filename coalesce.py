@@ -0,0 +1,165 @@
+import functools
+import inspect
+import json
+import threading
+from typing import Any, Callable, Hashable
+
+import events
+from admission import AdmissionCancelled, BackgroundWork, current_background_work
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.background: BackgroundWork | None = None
+        self.followers = 0
+        self.settled = 0
+        self.condition = threading.Condition()
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time. Callers arriving while a call is in flight wait for it and share its
+    result instead of starting their own. A call led by background work is promoted once a real caller waits for it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, function: Callable[[], Any],
+           share: Callable[[Any], Any] | None = None) -> tuple[Any, bool]:
+        """
+        Runs a function unless an identical call is already in flight, in which case its result is shared.
+
+        Args:
+            key: Identifies identical calls.
+            function: The call to run.
+            share: Optional callable run by every caller sharing the call, on the call's result, to take what it needs
+                from resources the leading caller owns. The leading caller only returns once every share has run.
+
+        Returns:
+            The call's result, or what share returned for it, and whether it was shared from another caller's call.
+
+        Raises:
+            BaseException: Whatever the call raised, re-raised in every caller that shared it.
+        """
+        background = current_background_work()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                call.background = background
+            else:
+                call.followers += 1
+                if (call.background is not None) and (background is None):
+                    call.background.promote()
+
+        if not leader:
+            call.done.wait()
+            try:
+                if isinstance(call.error, AdmissionCancelled) and (background is None):
+                    # The background work was cancelled before this caller joined it, so it runs the call itself.
+                    return self.do(key, function, share)
+                if call.error is not None:
+                    raise call.error
+                return (call.result if share is None else share(call.result)), True
+            finally:
+                with call.condition:
+                    call.settled += 1
+                    call.condition.notify_all()
+
+        try:
+            call.result = function()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # No caller can join once the call is removed, so the number of followers is final.
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+            if share is not None:
+                with call.condition:
+                    call.condition.wait_for(lambda: call.settled == call.followers)
+
+
+_flights = SingleFlight()
+
+
+def coalesced(artifact: str, key: Callable[..., Hashable] | None = None) -> Callable:
+    """
+    Decorates a scrape function so that identical concurrent calls, ie: from several Streamlit sessions scraping the
+    same team, share a single underlying scrape.
+
+    Functions with an "archive" parameter are run once into the leading caller's archive, and the files they wrote are
+    copied from it into the archive of every caller that shared the scrape. Other functions share their return value.
+    Either way, the events the scrape emitted are replayed to every caller that shared it.
+
+    Args:
+        artifact: Name of the artifact the function scrapes.
+        key: Optional callable receiving the function's arguments (except "archive") and returning a hashable key.
+            By default the arguments are serialized to JSON.
+
+    Returns:
+        The decorator.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        signature = inspect.signature(function)
+        writes_archive = "archive" in signature.parameters
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs) -> Any:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+
+            arguments = dict(bound.arguments)
+            archive = arguments.pop("archive", None)
+
+            flight_key = (artifact, key(**arguments) if key else json.dumps(arguments, sort_keys=True, default=str))
+
+            def run_recording_events() -> tuple[Any, list[events.ScrapeEvent]]:
+                # The scrape's events reach the caller that ran it as usual, and are kept so that they can be replayed
+                # to the callers sharing it.
+                recorded = []
+                sink = events.current_sink()
+
+                def record(event: events.ScrapeEvent) -> None:
+                    recorded.append(event)
+                    sink(event)
+
+                with events.capture(record):
+                    if not writes_archive:
+                        return function(*args, **kwargs), recorded
+
+                    with archive.recording() as filenames:
+                        function(**arguments, archive=archive)
+                    return (archive, filenames), recorded
+
+            def copy_files(result: tuple[Any, list[events.ScrapeEvent]]) -> tuple[Any, list[events.ScrapeEvent]]:
+                # Runs while the leading caller waits, so its archive is still open.
+                (source, filenames), recorded = result
+                if source is not archive:
+                    source.copy_to(archive, filenames)
+                return (archive, filenames), recorded
+
+            (result, recorded), shared = _flights.do(flight_key, run_recording_events,
+                                                     copy_files if writes_archive else None)
+
+            if shared:
+                for event in recorded:
+                    events.emit(event)
+
+            if not writes_archive:
+                return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from typing import NamedTuple
+
+from bs4 import BeautifulSoup
+
+from coalesce import SingleFlight
+from config import CONFERENCE_INDEX_TTL
+from fetch import fetch_page
+
+logger = logging.getLogger(__name__)
+
+
+class ConferenceIndex(NamedTuple):
+    box_scores: dict[str, list]
+    built_at: float
+
+
+_indexes: dict[tuple[str, str], ConferenceIndex] = {}
+_indexes_lock = threading.Lock()
+_flights = SingleFlight()
+
+
+def get_conference_box_scores(team_data: dict, strategy: str) -> list:
+    """
+    Looks up a team's box scores in the index of its conference's schedule, building the index if it is missing or
+    older than NU_SCRAPER_CONFERENCE_INDEX_TTL.
+
+    Args:
+        team_data: Dictionary containing team data.
+        strategy: "http" or "browser", as returned by get_fetch_strategy.
+
+    Returns:
+        The team's box scores in schedule order. For Boost conferences these are box score PDF URLs, for Sidearm
+        conferences tuples of the form (home_team, away_team, date, box_score_url).
+    """
+    provider = team_data["conference_schedule_provider"]
+    key = (provider, team_data["conference_base_url"])
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+
+    if (index is None) or (time.monotonic() - index.built_at > CONFERENCE_INDEX_TTL):
+        # Teams of the same conference scraped at the same time share one build.
+        index, _ = _flights.do(key, lambda: build_conference_index(provider, team_data["conference_base_url"],
+                                                                   strategy))
+
+    team_key = team_data["abbreviation"] if provider == "Boost" else team_data["name"]
+    return index.box_scores.get(team_key, [])
+
+
+def build_conference_index(provider: str, conference_base_url: str, strategy: str) -> ConferenceIndex:
+    """
+    Fetches a conference's full schedule once and indexes its box scores by team.
+
+    Args:
+        provider: "Boost" or "Sidearm".
+        conference_base_url: Base URL of the conference's website.
+        strategy: "http" or "browser", as returned by get_fetch_strategy.
+
+    Returns:
+        The index, which is also kept for the other teams of the conference if the schedule page became ready and
+        listed at least one box score.
+    """
+    start = time.perf_counter()
+
+    if provider == "Boost":
+        page = fetch_page(f"{conference_base_url}/msoc/schedule/", "boost_schedule", strategy)
+        box_scores = index_boost_schedule(page.doc)
+    else:
+        page = fetch_page(f"{conference_base_url}/calendar.aspx?path=msoc", "sidearm_calendar", strategy)
+        box_scores = index_sidearm_calendar(page.doc.find_all("table"), conference_base_url)
+
+    index = ConferenceIndex(box_scores, time.monotonic())
+
+    if page.ready and box_scores:
+        with _indexes_lock:
+            _indexes[(provider, conference_base_url)] = index
+    else:
+        # A schedule that did not load is not kept, so that the next scrape of the conference fetches it again.
+        logger.warning("The schedule of %s %s, not keeping its index", conference_base_url,
+                       "did not become ready" if not page.ready else "lists no box scores")
+
+    logger.info("Indexed %d teams' box scores from %s in %.2fs", len(box_scores), conference_base_url,
+                time.perf_counter() - start)
+
+    return index
+
+
+def index_boost_schedule(doc: BeautifulSoup) -> dict[str, list[str]]:
+    """
+    Indexes the box scores of a conference website provided by Boost by team abbreviation.
+
+    Args:
+        doc: The BeautifulSoup object containing the parsed schedule.
+
+    Returns:
+        Mapping of team abbreviation to the URLs of its box score PDFs, in schedule order.
+    """
+    box_scores: dict[str, list[str]] = {}
+
+    schedule_table = doc.find("table")
+    for table_row in schedule_table.find("tbody").find_all("tr"):
+        anchor = table_row.find("a", string="Box Score")
+        if not anchor:
+            continue
+
+        table_cells = table_row.find_all("td")
+        for team_abbreviation in {table_cells[2].text, table_cells[4].text}:
+            box_scores.setdefault(team_abbreviation, []).append(anchor["href"])
+
+    return box_scores
+
+
+def index_sidearm_calendar(match_tables: list, conference_base_url: str) -> dict[str, list[tuple[str, str, str, str]]]:
+    """
+    Indexes the matches with a box score of a conference calendar provided by Sidearm by team name.
+
+    Args:
+        match_tables: List of match table elements.
+        conference_base_url: Base URL of the conference's website, which box score links are relative to.
+
+    Returns:
+        Mapping of team name to its matches represented as tuples of the form (home_team, away_team, date,
+        box_score_url), in schedule order.
+    """
+    box_scores: dict[str, list[tuple[str, str, str, str]]] = {}
+
+    for match_table in match_tables:
+        match_table_body = match_table.find("tbody")
+
+        for tr in match_table_body.find_all("tr"):
+            anchor = tr.find("a", string="Box Score")
+            if not anchor:
+                continue
+
+            away_team = get_team_name(tr, 'sidearm-team-away')
+            home_team = get_team_name(tr, 'sidearm-team-home')
+            date = extract_match_date(match_table)
+
+            match = (home_team, away_team, date, conference_base_url + anchor["href"])
+            for team_name in {home_team, away_team}:
+                box_scores.setdefault(team_name, []).append(match)
+
+    return box_scores
+
+
+def get_team_name(table_row: BeautifulSoup, team_class: str) -> str:
+    """
+    Extract the team name from a table row.
+
+    Args:
+        table_row: Table row element containing team data.
+        team_class: Class name to identify the team.
+
+    Returns:
+        Extracted team name.
+    """
+    team_td = table_row.select_one(f'td[class*="{team_class}"]')
+    return team_td.find("span", class_="sidearm-calendar-list-group-list-game-team-title").find(['a', 'span']).text
+
+
+def extract_match_date(match_table: BeautifulSoup) -> str:
+    """
+    Extract the match date from the match table caption.
+
+    Args:
+        match_table: Match table element.
+
+    Returns:
+        Extracted match date.
+    """
+    match_table_caption = match_table.find("caption")
+    return match_table_caption.find("span",
+                                    class_="hide-on-medium sidearm-calendar-list-group-heading-date").text.replace("/",
+                                                                                                                   "_")
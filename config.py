@@ -0,0 +1,182 @@
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Reads an integer setting from the environment.
+
+    Args:
+        name: Name of the environment variable.
+        default: Value to use when the variable is unset or empty.
+
+    Returns:
+        The integer value of the setting.
+    """
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """
+    Reads a boolean setting from the environment.
+
+    Args:
+        name: Name of the environment variable.
+        default: Value to use when the variable is unset or empty.
+
+    Returns:
+        True for "1", "true", "yes" or "on" (case-insensitive), False for any other non-empty value.
+    """
+    value = os.environ.get(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    Reads a decimal setting from the environment.
+
+    Args:
+        name: Name of the environment variable.
+        default: Value to use when the variable is unset or empty.
+
+    Returns:
+        The decimal value of the setting.
+    """
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+# Maximum number of Chromium instances kept alive by the driver pool, and of browser leases granted at once.
+DRIVER_POOL_SIZE = env_int("NU_SCRAPER_DRIVER_POOL_SIZE", 2)
+
+# Combined resident size in bytes of every Chromium process past which new browser leases wait. 0 disables the budget.
+BROWSER_MEMORY_BUDGET = env_int("NU_SCRAPER_BROWSER_MEMORY_BUDGET", 1536 * 1024 * 1024)
+
+# Number of drivers started in the background as soon as the pool is created.
+DRIVER_POOL_WARM_SIZE = env_int("NU_SCRAPER_DRIVER_POOL_WARM_SIZE", 1)
+
+# A pooled driver is quit and replaced after it has loaded this many pages.
+DRIVER_MAX_PAGES = env_int("NU_SCRAPER_DRIVER_MAX_PAGES", 50)
+
+# Pinned chromedriver used when webdriver-manager cannot resolve one (for example on offline workers).
+CHROMEDRIVER_PATH = os.environ.get("NU_SCRAPER_CHROMEDRIVER_PATH", "")
+
+# Pinned Chromium binary. Left empty, Selenium uses whichever Chromium it finds on the PATH.
+CHROMIUM_PATH = os.environ.get("NU_SCRAPER_CHROMIUM_PATH", "")
+
+# Skip webdriver-manager entirely and go straight to the pinned binaries.
+OFFLINE = env_flag("NU_SCRAPER_OFFLINE")
+
+# Seconds to wait for a page's readiness condition before parsing whatever has loaded.
+PAGE_READY_TIMEOUT = env_int("NU_SCRAPER_PAGE_READY_TIMEOUT", 10)
+
+# Seconds a browser navigation may take before it is abandoned, and seconds a script run in the page may take.
+PAGE_LOAD_TIMEOUT = env_int("NU_SCRAPER_PAGE_LOAD_TIMEOUT", 30)
+SCRIPT_TIMEOUT = env_int("NU_SCRAPER_SCRIPT_TIMEOUT", 15)
+
+# Block ads, trackers, chat widgets and, on pages that are only parsed, images and fonts while the browser scrapes.
+BLOCK_REQUESTS = env_flag("NU_SCRAPER_BLOCK_REQUESTS", True)
+
+# Maximum number of artifact jobs (roster, schedule, stats, ...) run at once for a single scrape.
+SCRAPE_WORKERS = env_int("NU_SCRAPER_SCRAPE_WORKERS", 3)
+
+# Number of selected articles loading at once, each in its own tab of the same browser, while they are printed.
+ARTICLE_TABS = env_int("NU_SCRAPER_ARTICLE_TABS", 4)
+
+# Seconds an article may take to load before it is skipped.
+ARTICLE_TIMEOUT = env_int("NU_SCRAPER_ARTICLE_TIMEOUT", 30)
+
+# Maximum number of Sidearm box score PDF URLs resolved at once.
+BOX_SCORE_WORKERS = env_int("NU_SCRAPER_BOX_SCORE_WORKERS", 4)
+
+# Seconds before a plain HTTP request to an athletics site is abandoned.
+HTTP_TIMEOUT = env_int("NU_SCRAPER_HTTP_TIMEOUT", 15)
+
+# Maximum number of requests and browser navigations in flight to the same host at once, across every scrape.
+HOST_CONCURRENCY = env_int("NU_SCRAPER_HOST_CONCURRENCY", 2)
+
+# Requests and browser navigations per second sent to the same host. Halved whenever the host answers 429 or 503, then
+# recovered gradually. 0 disables the limit.
+HOST_REQUESTS_PER_SECOND = env_float("NU_SCRAPER_HOST_REQUESTS_PER_SECOND", 2.0)
+
+# Number of times a request or navigation that failed for a transient reason (timeout, connection error, 429 or 5xx)
+# is attempted in total, waiting a jittered, doubling backoff starting at RETRY_BACKOFF seconds between attempts.
+RETRY_ATTEMPTS = env_int("NU_SCRAPER_RETRY_ATTEMPTS", 3)
+RETRY_BACKOFF = env_float("NU_SCRAPER_RETRY_BACKOFF", 0.5)
+RETRY_MAX_BACKOFF = env_float("NU_SCRAPER_RETRY_MAX_BACKOFF", 8.0)
+
+# Consecutive transient failures after which a host is skipped, and seconds it is skipped for before one trial
+# request is let through. 0 failures disables the circuit breaker.
+BREAKER_FAILURES = env_int("NU_SCRAPER_BREAKER_FAILURES", 5)
+BREAKER_COOLDOWN = env_int("NU_SCRAPER_BREAKER_COOLDOWN", 60)
+
+# Seconds each artifact of a scrape may take before its remaining requests are given up on. Each can be overridden
+# with NU_SCRAPER_DEADLINE_<ARTIFACT>.
+ARTIFACT_DEADLINES = {
+    artifact: env_int(f"NU_SCRAPER_DEADLINE_{artifact.upper()}", default)
+    for artifact, default in {
+        "roster": 90,
+        "schedule": 120,
+        "stats": 120,
+        "box_scores": 180,
+        "articles": 90,
+    }.items()
+}
+
+# Maximum number of keep-alive connections kept open per host by the shared HTTP session.
+HTTP_POOL_SIZE = env_int("NU_SCRAPER_HTTP_POOL_SIZE", 10)
+
+# Maximum number of PDFs downloaded at once by a single batch.
+PDF_DOWNLOAD_WORKERS = env_int("NU_SCRAPER_PDF_DOWNLOAD_WORKERS", 4)
+
+# Size in bytes past which a scrape's zip archive is moved from memory to a temporary file.
+ARCHIVE_SPILL_THRESHOLD = env_int("NU_SCRAPER_ARCHIVE_SPILL_THRESHOLD", 32 * 1024 * 1024)
+
+# Directory of the persistent page and PDF cache.
+CACHE_DIR = os.environ.get("NU_SCRAPER_CACHE_DIR", os.path.expanduser("~/.cache/nu-soccer-scraper"))
+
+# Maximum total size in bytes of the cached pages and PDFs before the least recently used ones are evicted.
+CACHE_MAX_BYTES = env_int("NU_SCRAPER_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+
+# Seconds a cached page or PDF stays fresh, per artifact. Each can be overridden with NU_SCRAPER_CACHE_TTL_<ARTIFACT>.
+CACHE_TTLS = {
+    artifact: env_int(f"NU_SCRAPER_CACHE_TTL_{artifact.upper()}", default)
+    for artifact, default in {
+        "roster": 6 * 60 * 60,
+        "schedule": 60 * 60,
+        "stats": 60 * 60,
+        "box_scores": 30 * 60,
+        "articles": 15 * 60,
+        "article": 24 * 60 * 60,
+    }.items()
+}
+
+# Seconds a conference's indexed schedule is reused for its teams' box scores before the schedule is fetched again.
+CONFERENCE_INDEX_TTL = env_int("NU_SCRAPER_CONFERENCE_INDEX_TTL", 30 * 60)
+
+# Seconds a finished artifact that can still change (ie: the current season's stats) is served from the cache.
+RESULT_TTL = env_int("NU_SCRAPER_RESULT_TTL", 10 * 60)
+
+# Start warming a team's pages and PDFs in the background as soon as it is selected, before Scrape is clicked.
+PREFETCH = env_flag("NU_SCRAPER_PREFETCH", True)
+
+# Maximum number of teams prefetched at once across every session.
+PREFETCH_WORKERS = env_int("NU_SCRAPER_PREFETCH_WORKERS", 1)
+
+# Maximum number of scrapes run at once across every session. Scrapes submitted past the cap wait in a queue.
+MAX_CONCURRENT_JOBS = env_int("NU_SCRAPER_MAX_CONCURRENT_JOBS", 2)
+
+# Seconds a finished scrape's archive is kept for download before it is discarded.
+JOB_TTL = env_int("NU_SCRAPER_JOB_TTL", 30 * 60)
+
+# Seconds between two refreshes of a running scrape's progress in the app.
+JOB_POLL_INTERVAL = env_int("NU_SCRAPER_JOB_POLL_INTERVAL", 1)
+
+# Cron expression ("minute hour day-of-month month day-of-week") of when warmup.py crawls every team.
+WARMUP_SCHEDULE = os.environ.get("NU_SCRAPER_WARMUP_SCHEDULE", "0 5 * * *")
+
+# Maximum number of artifacts warmup.py warms at once.
+WARMUP_WORKERS = env_int("NU_SCRAPER_WARMUP_WORKERS", 4)
+
+# Maximum number of artifacts warmup.py warms at once from the same host.
+WARMUP_HOST_CONCURRENCY = env_int("NU_SCRAPER_WARMUP_HOST_CONCURRENCY", 1)
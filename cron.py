@@ -0,0 +1,120 @@
+import datetime as dt
+
+# Ranges of the five cron fields: minute, hour, day of month, month and day of week (0 and 7 are Sunday).
+CRON_FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+
+class CronSchedule:
+    """
+    Five-field cron expression ("minute hour day-of-month month day-of-week"). Each field accepts "*", numbers, ranges
+    ("1-5"), steps ("*/15", "8-20/2") and comma-separated lists of those.
+    """
+
+    def __init__(self, expression: str) -> None:
+        """
+        Parses a cron expression.
+
+        Args:
+            expression: The cron expression.
+
+        Raises:
+            ValueError: If the expression does not have five valid fields.
+        """
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 fields in cron expression {expression!r}, got {len(fields)}")
+
+        self.expression = expression
+        self._restricted = [field != "*" for field in fields]
+        self._allowed = [parse_cron_field(field, low, high) for field, (low, high) in zip(fields, CRON_FIELD_RANGES)]
+
+        # Sunday may be written as 7 as well as 0.
+        if 7 in self._allowed[4]:
+            self._allowed[4] = (self._allowed[4] - {7}) | {0}
+
+    def matches(self, moment: dt.datetime) -> bool:
+        """
+        Checks whether the schedule fires at a given minute.
+
+        Args:
+            moment: The minute to check.
+
+        Returns:
+            True if the schedule fires at that minute.
+        """
+        minutes, hours, days, months, weekdays = self._allowed
+
+        if (moment.minute not in minutes) or (moment.hour not in hours) or (moment.month not in months):
+            return False
+
+        day_matches = moment.day in days
+        weekday_matches = (moment.weekday() + 1) % 7 in weekdays
+
+        # As in cron, a restricted day of month and day of week match when either one does.
+        if self._restricted[2] and self._restricted[4]:
+            return day_matches or weekday_matches
+
+        return day_matches and weekday_matches
+
+    def next_run(self, after: dt.datetime) -> dt.datetime:
+        """
+        Finds the first minute after a moment at which the schedule fires.
+
+        Args:
+            after: The moment to search from.
+
+        Returns:
+            The next run.
+
+        Raises:
+            ValueError: If the schedule never fires within a year, ie: on February 30th.
+        """
+        moment = after.replace(second=0, microsecond=0) + dt.timedelta(minutes=1)
+        deadline = moment + dt.timedelta(days=366)
+
+        while moment < deadline:
+            if self.matches(moment):
+                return moment
+            moment += dt.timedelta(minutes=1)
+
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+
+def parse_cron_field(field: str, low: int, high: int) -> set[int]:
+    """
+    Expands one cron field into the values it allows.
+
+    Args:
+        field: The field, ie: "*/15" or "1-5,10".
+        low: Smallest value of the field.
+        high: Largest value of the field.
+
+    Returns:
+        The allowed values.
+
+    Raises:
+        ValueError: If the field is malformed or out of range.
+    """
+    values = set()
+
+    for part in field.split(","):
+        base, _, step = part.partition("/")
+
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = map(int, base.split("-", 1))
+        else:
+            # As in cron, a single value with a step ("5/10") runs from that value to the end of the range.
+            start = int(base)
+            end = high if step else start
+
+        if (start < low) or (end > high) or (start > end):
+            raise ValueError(f"Cron field {field!r} is out of range {low}-{high}")
+
+        if step and (int(step) < 1):
+            raise ValueError(f"Cron field {field!r} has a step below 1")
+
+        values.update(range(start, end + 1, int(step) if step else 1))
+
+    return values
@@ -0,0 +1,258 @@
+import atexit
+import threading
+from contextlib import AbstractContextManager, ExitStack, contextmanager
+from typing import Iterator
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+from selenium.common import WebDriverException
+
+from admission import AdmissionController
+from config import BROWSER_MEMORY_BUDGET, DRIVER_MAX_PAGES, DRIVER_POOL_SIZE, DRIVER_POOL_WARM_SIZE
+from resilience import time_left
+from utils import initialize_web_driver, resolve_driver_binaries
+
+
+class PooledChrome(webdriver.Chrome):
+    """
+    Chrome driver that keeps track of how many pages it has loaded and which origins it has visited.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.pages_loaded = 0
+        self.visited_origins: set[str] = set()
+
+    def get(self, url: str) -> None:
+        self.record_navigation(url)
+        super().get(url)
+
+    def record_navigation(self, url: str) -> None:
+        """
+        Counts a page load, including ones started without get(), ie: in another tab.
+
+        Args:
+            url: URL of the page.
+
+        Returns:
+            None
+        """
+        self.pages_loaded += 1
+
+        parts = urlsplit(url)
+        if parts.scheme in ("http", "https"):
+            self.visited_origins.add(f"{parts.scheme}://{parts.netloc}")
+
+
+class DriverPool:
+    """
+    Process-wide pool of warm Chromium drivers that are lent out to the download functions.
+    """
+
+    def __init__(self, size: int, max_pages: int, memory_budget: int = 0) -> None:
+        """
+        Initializes an empty driver pool.
+
+        Args:
+            size: Maximum number of drivers alive at once.
+            max_pages: Number of page loads after which a driver is quit and replaced.
+            memory_budget: Resident size in bytes of every browser process combined past which new leases wait.
+                0 disables the budget.
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.admission = AdmissionController(size, memory_budget, self._trim_idle)
+
+        self._idle: list[PooledChrome] = []
+        self._alive = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def lease(self) -> Iterator[PooledChrome]:
+        """
+        Borrows a healthy driver from the pool, blocking until it is this caller's turn. Callers are served in arrival
+        order, and wait while the browsers are over the memory budget, but no longer than the current deadline.
+
+        Returns:
+            A context manager yielding the borrowed driver. The driver is reset and returned to the pool on exit.
+
+        Raises:
+            WebDriverException: If the deadline passes before it is this caller's turn.
+        """
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(self.admission.admit(time_left(None)))
+            except TimeoutError as e:
+                raise WebDriverException(f"The scrape ran past its deadline: {e}") from e
+
+            driver = self._checkout()
+            try:
+                yield driver
+            finally:
+                self._checkin(driver)
+
+    def warm(self, count: int) -> None:
+        """
+        Starts drivers ahead of time so that the first lease does not pay for Chromium's startup.
+
+        Args:
+            count: Number of idle drivers to have ready.
+
+        Returns:
+            None
+        """
+        for _ in range(count):
+            with self._lock:
+                if self._closed or (self._alive >= self.size) or (len(self._idle) >= count):
+                    return
+                self._alive += 1
+
+            try:
+                driver = initialize_web_driver(PooledChrome)
+            except WebDriverException:
+                with self._lock:
+                    self._alive -= 1
+                return
+
+            with self._lock:
+                self._idle.append(driver)
+
+    def close(self) -> None:
+        """
+        Quits every idle driver. Drivers that are still leased are quit when they are returned.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+
+        for driver in idle:
+            self._discard(driver)
+
+    def _trim_idle(self) -> bool:
+        with self._lock:
+            driver = self._idle.pop(0) if self._idle else None
+
+        if driver is None:
+            return False
+
+        self._discard(driver)
+        return True
+
+    def _checkout(self) -> PooledChrome:
+        while True:
+            with self._lock:
+                driver = self._idle.pop() if self._idle else None
+                if driver is None:
+                    self._alive += 1
+
+            if driver is None:
+                try:
+                    return initialize_web_driver(PooledChrome)
+                except Exception:
+                    with self._lock:
+                        self._alive -= 1
+                    raise
+
+            if is_healthy(driver):
+                return driver
+
+            self._discard(driver)
+
+    def _checkin(self, driver: PooledChrome) -> None:
+        if self._closed or (driver.pages_loaded >= self.max_pages) or (not reset_driver(driver)):
+            self._discard(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    def _discard(self, driver: PooledChrome) -> None:
+        with self._lock:
+            self._alive -= 1
+
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+
+def is_healthy(driver: webdriver.Chrome) -> bool:
+    """
+    Checks whether a driver's browser session is still responsive.
+
+    Args:
+        driver: Selenium webdriver instance.
+
+    Returns:
+        True if the browser answered a trivial script, False otherwise.
+    """
+    try:
+        return driver.execute_script("return 1;") == 1
+    except WebDriverException:
+        return False
+
+
+def reset_driver(driver: PooledChrome) -> bool:
+    """
+    Clears the state a lease left behind: extra tabs, cookies, and storage for every visited origin.
+
+    Args:
+        driver: The pooled driver to reset.
+
+    Returns:
+        True if the driver was reset and can be reused, False if it has crashed.
+    """
+    try:
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        webdriver.Chrome.get(driver, "about:blank")
+
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        for origin in driver.visited_origins:
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        driver.visited_origins.clear()
+
+        return True
+    except WebDriverException:
+        return False
+
+
+_pool: DriverPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """
+    Returns the process-wide driver pool, creating and warming it on first use.
+
+    Returns:
+        The shared driver pool.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            resolve_driver_binaries()
+            _pool = DriverPool(DRIVER_POOL_SIZE, DRIVER_MAX_PAGES, BROWSER_MEMORY_BUDGET)
+            atexit.register(_pool.close)
+            threading.Thread(target=_pool.warm, args=(DRIVER_POOL_WARM_SIZE,), daemon=True).start()
+
+    return _pool
+
+
+def borrow_driver() -> AbstractContextManager[PooledChrome]:
+    """
+    Borrows a driver from the process-wide pool.
+
+    Returns:
+        A context manager yielding the borrowed driver.
+    """
+    return get_driver_pool().lease()
@@ -0,0 +1,106 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeEvent(NamedTuple):
+    item: str
+    ok: bool
+    reason: str | None
+    elapsed: float | None
+    timestamp: float
+
+
+EventSink = Callable[[ScrapeEvent], None]
+
+_sink: ContextVar[EventSink | None] = ContextVar("scrape_event_sink", default=None)
+
+
+def log_event(event: ScrapeEvent) -> None:
+    """
+    Default sink, used when no caller is capturing events. Writes the event to the log.
+
+    Args:
+        event: The event.
+
+    Returns:
+        None
+    """
+    if event.ok:
+        logger.info("%s succeeded", event.item)
+    else:
+        logger.warning("%s failed: %s", event.item, event.reason)
+
+
+def current_sink() -> EventSink:
+    """
+    Returns the sink events emitted in the current context are sent to.
+
+    Returns:
+        The current sink.
+    """
+    return _sink.get() or log_event
+
+
+@contextmanager
+def capture(sink: EventSink) -> Iterator[None]:
+    """
+    Sends every event emitted in the current context to a sink until the context manager exits.
+
+    Args:
+        sink: Callable receiving each event.
+
+    Returns:
+        A context manager.
+    """
+    token = _sink.set(sink)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def emit(event: ScrapeEvent) -> None:
+    """
+    Sends an event to the current sink.
+
+    Args:
+        event: The event.
+
+    Returns:
+        None
+    """
+    current_sink()(event)
+
+
+def succeeded(item: str, elapsed: float | None = None) -> None:
+    """
+    Reports that an item, usually a PDF file, was scraped.
+
+    Args:
+        item: The item's name, ie: the PDF's filename.
+        elapsed: Seconds it took to produce the item, if known.
+
+    Returns:
+        None
+    """
+    emit(ScrapeEvent(item, True, None, elapsed, time.time()))
+
+
+def failed(item: str, reason: str, elapsed: float | None = None) -> None:
+    """
+    Reports that an item could not be scraped.
+
+    Args:
+        item: The item's name, ie: the PDF's filename.
+        reason: Why the item could not be scraped.
+        elapsed: Seconds spent before giving up, if known.
+
+    Returns:
+        None
+    """
+    emit(ScrapeEvent(item, False, reason, elapsed, time.time()))
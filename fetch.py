@@ -0,0 +1,133 @@
+import logging
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+import requests
+from bs4 import BeautifulSoup
+
+from cache import get_page_cache
+from config import CACHE_TTLS
+from driver_pool import borrow_driver
+from pages import PAGE_PROFILES, load_page
+from utils import cached_http_get
+
+logger = logging.getLogger(__name__)
+
+
+class FetchedPage(NamedTuple):
+    doc: BeautifulSoup
+    served_by: str
+    ready: bool
+
+
+_served_by_counts: Counter = Counter()
+_served_by_lock = threading.Lock()
+
+
+def get_fetch_strategy(team_data: dict, artifact: str) -> str:
+    """
+    Looks up how a team's pages for an artifact should be fetched.
+
+    Args:
+        team_data: Dictionary containing team data.
+        artifact: Name of the artifact, ie: "stats" or "box_scores".
+
+    Returns:
+        "http" to try a plain HTTP request before the browser, or "browser" to always use the browser.
+    """
+    return team_data.get("fetch_strategy", {}).get(artifact, "browser")
+
+
+def fetch_page(url: str, page_kind: str, strategy: str) -> FetchedPage:
+    """
+    Fetches and parses a page, using a plain HTTP request when the strategy allows it and the page's readiness
+    element is present in the server-rendered HTML, a cached rendering of the page if one is fresh, and a browser
+    borrowed from the pool otherwise.
+
+    Args:
+        url: URL of the page.
+        page_kind: Key into PAGE_PROFILES.
+        strategy: "http" or "browser", as returned by get_fetch_strategy.
+
+    Returns:
+        The parsed page, which path ("http", "cache" or "browser") served it and whether it became ready. Pages served
+        over HTTP or from the cache are always ready.
+    """
+    if strategy == "http":
+        doc = fetch_server_rendered_page(url, page_kind)
+        if doc is not None:
+            return record_served_by(url, page_kind, FetchedPage(doc, "http", True))
+
+    profile = PAGE_PROFILES[page_kind]
+    cache = get_page_cache()
+
+    page_source = cache.get(url, "dom")
+    if page_source is not None:
+        return record_served_by(url, page_kind, FetchedPage(BeautifulSoup(page_source, "lxml"), "cache", True))
+
+    with borrow_driver() as driver:
+        ready = load_page(driver, url, page_kind)
+        page_source = driver.page_source
+
+    if ready:
+        cache.put(url, "dom", page_source.encode(), CACHE_TTLS[profile.artifact])
+
+    return record_served_by(url, page_kind, FetchedPage(BeautifulSoup(page_source, "lxml"), "browser", ready))
+
+
+def fetch_server_rendered_page(url: str, page_kind: str) -> BeautifulSoup | None:
+    """
+    Fetches a page over plain HTTP and checks that it already contains its readiness element.
+
+    Args:
+        url: URL of the page.
+        page_kind: Key into PAGE_PROFILES.
+
+    Returns:
+        The parsed page, or None if the request failed or the page needs JavaScript to render.
+    """
+    try:
+        response = cached_http_get(url, PAGE_PROFILES[page_kind].artifact)
+    except requests.RequestException as e:
+        logger.info("HTTP fetch of %s failed, falling back to the browser: %s", url, e)
+        return None
+
+    if (response.status_code != 200) or ("html" not in (response.content_type or "")):
+        return None
+
+    doc = BeautifulSoup(response.content, "lxml")
+    if doc.select_one(PAGE_PROFILES[page_kind].ready_selector) is None:
+        return None
+
+    return doc
+
+
+def record_served_by(url: str, page_kind: str, page: FetchedPage) -> FetchedPage:
+    """
+    Logs and counts which path served a page.
+
+    Args:
+        url: URL of the page.
+        page_kind: Key into PAGE_PROFILES.
+        page: The fetched page.
+
+    Returns:
+        The same fetched page.
+    """
+    with _served_by_lock:
+        _served_by_counts[(page_kind, page.served_by)] += 1
+
+    logger.info("%s page served by %s: %s", page_kind, page.served_by, url)
+    return page
+
+
+def get_served_by_counts() -> dict[tuple[str, str], int]:
+    """
+    Returns how many pages each path has served so far, per page kind.
+
+    Returns:
+        Mapping of (page kind, "http", "cache" or "browser") to the number of pages served.
+    """
+    with _served_by_lock:
+        return dict(_served_by_counts)
@@ -0,0 +1,198 @@
+import datetime as dt
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from pandas import DataFrame
+
+import events
+from archive import ArchiveWriter
+from articles import download_articles
+from config import JOB_TTL, MAX_CONCURRENT_JOBS, SCRAPE_WORKERS
+from scrape import JobOutcome, build_jobs, run_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeJob:
+    """
+    A scrape running in the background, and everything it has produced so far. The job's thread is the only writer;
+    the app reads it from any number of reruns.
+    """
+
+    def __init__(self, team_data: dict, artifacts: list[str]) -> None:
+        self.id = uuid.uuid4().hex
+        self.team_name: str = team_data["name"]
+        self.artifacts = artifacts
+        self.archive = ArchiveWriter()
+        self.events: list[events.ScrapeEvent] = []
+        self.outcomes: list[JobOutcome] = []
+        self.articles: DataFrame | None = None
+        self.status = "queued"
+        self.submitted_at = time.monotonic()
+        self.finished_at: float | None = None
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the job is queued or still scraping.
+
+        Returns:
+            True until the job has finished.
+        """
+        return self.status in ("queued", "running", "downloading")
+
+    def finish(self, status: str) -> None:
+        """
+        Marks the job as finished, starting its TTL.
+
+        Args:
+            status: "done", or "awaiting_articles" if the user still has to pick which articles to download.
+
+        Returns:
+            None
+        """
+        self.finished_at = time.monotonic()
+        self.status = status
+
+
+class JobScheduler:
+    """
+    Runs scrapes on a bounded pool of background threads, so that they survive Streamlit reruns and at most
+    max_jobs of them run at once across every session. Finished jobs are kept for ttl seconds.
+    """
+
+    def __init__(self, max_jobs: int, ttl: float) -> None:
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="scrape-job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, ScrapeJob] = {}
+
+    def submit(self, team_data: dict, artifacts: list[str], years: list[str] | None = None, count: int | None = None,
+               date_range: tuple[dt.date, dt.date] | None = None) -> str:
+        """
+        Queues a scrape of a team.
+
+        Args:
+            team_data: Dictionary containing team data.
+            artifacts: Artifacts to scrape, a subset of ARTIFACTS.
+            years: Years to download stats for. Required if "Stats" is selected.
+            count: Number of box scores to download. Required if "Box Scores" is selected.
+            date_range: Range of dates to fetch articles from. Required if "Articles" is selected.
+
+        Returns:
+            The job's id.
+        """
+        self.expire()
+
+        job = ScrapeJob(team_data, artifacts)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, team_data, years, count, date_range)
+        return job.id
+
+    def submit_articles(self, job_id: str, articles: DataFrame) -> bool:
+        """
+        Queues the download of the articles picked from a finished job's article list.
+
+        Args:
+            job_id: The job's id.
+            articles: The selected rows of the job's articles.
+
+        Returns:
+            True if the download was queued, False if the job has expired.
+        """
+        job = self.get(job_id)
+        if job is None:
+            return False
+
+        job.finished_at = None
+        job.status = "downloading"
+        self._executor.submit(self._download_articles, job, articles)
+        return True
+
+    def get(self, job_id: str) -> ScrapeJob | None:
+        """
+        Looks up a job.
+
+        Args:
+            job_id: The job's id.
+
+        Returns:
+            The job, or None if it never existed or has expired.
+        """
+        self.expire()
+
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def expire(self) -> None:
+        """
+        Discards the jobs that finished more than ttl seconds ago, along with their archives.
+
+        Returns:
+            None
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if (job.finished_at is not None) and (now - job.finished_at > self.ttl)]
+            for job in expired:
+                del self._jobs[job.id]
+
+        for job in expired:
+            logger.info("Discarding expired %s job %s", job.team_name, job.id)
+            job.archive.close()
+
+    def _run(self, job: ScrapeJob, team_data: dict, years: list[str] | None, count: int | None,
+             date_range: tuple[dt.date, dt.date] | None) -> None:
+        job.status = "running"
+
+        try:
+            jobs = build_jobs(team_data, job.artifacts, job.archive, years, count, date_range)
+            for update in run_jobs(jobs, SCRAPE_WORKERS):
+                if isinstance(update, events.ScrapeEvent):
+                    job.events.append(update)
+                    continue
+
+                job.outcomes.append(update)
+                if (update.name == "Articles") and (update.error is None):
+                    job.articles = update.result
+        except Exception:
+            logger.exception("%s job %s failed", job.team_name, job.id)
+
+        job.finish("awaiting_articles" if job.articles is not None else "done")
+
+    def _download_articles(self, job: ScrapeJob, articles: DataFrame) -> None:
+        with events.capture(job.events.append):
+            try:
+                download_articles(articles, job.archive)
+            except Exception as e:
+                logger.exception("Downloading %s articles failed", job.team_name)
+                events.failed("Downloading Articles", str(e))
+
+        job.finish("done")
+
+
+_scheduler: JobScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler() -> JobScheduler:
+    """
+    Returns the process-wide job scheduler, creating it on first use.
+
+    Returns:
+        The shared job scheduler.
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(MAX_CONCURRENT_JOBS, JOB_TTL)
+
+    return _scheduler
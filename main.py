@@ -1,18 +1,56 @@
 import datetime
-import io
 import json
+import logging
 
 import streamlit as st
 
-from articles import download_articles, fetch_articles
-from box_scores import download_box_scores
-from roster import download_roster
-from schedule import download_schedule
-from stats import download_stats
+import events
+from config import JOB_POLL_INTERVAL, PREFETCH
+from driver_pool import get_driver_pool
+from jobs import ScrapeJob, get_job_scheduler
+from prefetch import start_prefetch
+from resilience import get_breaker_stats
+from scrape import ARTIFACTS
+
+logging.basicConfig(level=logging.INFO)
+
+# Resolves the chromedriver binary and starts warming the driver pool as soon as the app process starts.
+get_driver_pool()
 
 with open("teams.json", "r") as file:
     teams: dict = json.load(file)
 
+STATS_YEARS = ["2024", "2023"]
+SEASON_START = datetime.date(2024, 8, 22)
+
+
+def default_article_range() -> tuple[datetime.date, datetime.date]:
+    """
+    Returns the date range the article picker starts with: from the start of the season to today.
+
+    Returns:
+        The default date range.
+    """
+    now = datetime.datetime.now()
+    return SEASON_START, datetime.date(now.year, now.month, now.day)
+
+
+def render_event(event: events.ScrapeEvent) -> None:
+    """
+    Renders a scrape event as a status line.
+
+    Args:
+        event: The event.
+
+    Returns:
+        None
+    """
+    if event.ok:
+        st.write(f"**{event.item}** :white_check_mark:")
+    else:
+        st.write(f"**{event.item}** :x:  \nReason: {event.reason}")
+
+
 st.title = "NU Soccer Web Scraper"
 
 team_name = st.selectbox(
@@ -22,13 +60,22 @@ team_name = st.selectbox(
     placeholder="ie: Northwestern",
 )
 
+# Warms the selected team's pages while the user picks what to scrape. Picking another team cancels the prefetch.
+if PREFETCH and (team_name != st.session_state.get("prefetched_team")):
+    if st.session_state.get("prefetch") is not None:
+        st.session_state.prefetch.cancel()
+
+    st.session_state.prefetched_team = team_name
+    st.session_state.prefetch = (start_prefetch(teams[team_name], STATS_YEARS, default_article_range())
+                                 if team_name else None)
+
 with st.container(border=True):
     if "disabled" not in st.session_state:
         st.session_state.disabled = False
 
     selected_data = st.segmented_control(
         label="Select the data you want to download:",
-        options=["Roster", "Schedule", "Stats", "Box Scores", "Articles"],
+        options=ARTIFACTS,
         selection_mode="multi",
         disabled=st.session_state.disabled
     )
@@ -38,14 +85,15 @@ with st.container(border=True):
         key="disabled"
     )
 
-data_to_scrape = ["Roster", "Schedule", "Stats", "Box Scores", "Articles"] if select_all else selected_data
+data_to_scrape = ARTIFACTS if select_all else selected_data
+years, count, date_range = None, None, None
 
 if "Stats" in data_to_scrape:
     with st.container(border=True):
         years = st.multiselect(
             label="Select which year's stats you would like to download:",
-            options=["2024", "2023"],
-            default=["2024", "2023"],
+            options=STATS_YEARS,
+            default=STATS_YEARS,
             placeholder="ie: 2024"
         )
 
@@ -70,13 +118,9 @@ if "Box Scores" in data_to_scrape:
 
 if "Articles" in data_to_scrape:
     with st.container(border=True):
-        season_start = datetime.date(2024, 8, 22)
-        now = datetime.datetime.now()
-        today = datetime.date(now.year, now.month, now.day)
-
         date_range = st.date_input(
             label="Enter the range of dates you would like to see articles:",
-            value=(season_start, today),
+            value=default_article_range(),
             format="MM/DD/YYYY",
         )
 
@@ -85,83 +129,139 @@ scrape_button = st.button(
     disabled=(not team_name) or (not data_to_scrape)
 )
 
+scheduler = get_job_scheduler()
+
 if scrape_button:
-    team_data = teams[team_name]
-    zip_buffer = io.BytesIO()
-
-    if "Roster" in data_to_scrape:
-        filename = f"{team_data['abbreviation']} Roster.pdf"
-        download_roster(team_data["roster_url"], filename, zip_buffer)
-
-    if "Schedule" in data_to_scrape:
-        filename = f"{team_data["abbreviation"]} Schedule.pdf"
-        download_schedule(team_data["name"], team_data["schedule_url"], filename, zip_buffer)
-
-    if "Box Scores" in data_to_scrape:
-        download_box_scores(team_data, count, zip_buffer)
-
-    if "Stats" in data_to_scrape:
-        download_stats(team_data, years, zip_buffer)
-
-    if "Articles" in data_to_scrape:
-        articles = fetch_articles(team_data, date_range)
-
-
-        @st.fragment
-        def select_articles():
-            column_configuration = {
-                "Date": st.column_config.DatetimeColumn(
-                    width="small",
-                    format="MM/DD/YYYY"
-                ),
-                "Posted": st.column_config.DatetimeColumn(
-                    width="small",
-                    format="MM/DD/YYYY"
-                ),
-                "Headline": st.column_config.TextColumn(
-                    width="large"
-                ),
-                "URL": None
-            }
-
-            if "submitted" not in st.session_state:
-                st.session_state.submitted = False
-
-            st.write("Select which articles you would like to download:")
-
-            all_articles = st.dataframe(
-                data=articles,
-                hide_index=True,
-                on_select="rerun",
-                selection_mode="multi-row",
-                column_config=column_configuration
-            )
+    st.session_state.job_id = scheduler.submit(teams[team_name], data_to_scrape, years, count, date_range)
+
+
+def render_progress(job: ScrapeJob) -> None:
+    """
+    Renders the status lines of a scrape.
+
+    Args:
+        job: The scrape.
+
+    Returns:
+        None
+    """
+    if job.status == "queued":
+        st.write("Waiting for other scrapes to finish...")
+
+    for event in list(job.events):
+        render_event(event)
+
+    for outcome in list(job.outcomes):
+        if outcome.error:
+            st.write(f"**{outcome.name}** :x:  \nReason: {outcome.error}")
+
+
+def render_unavailable_hosts() -> None:
+    """
+    Warns about the sites being skipped by their circuit breaker, whose files fail at once until the site recovers.
+
+    Returns:
+        None
+    """
+    for host, breaker in sorted(get_breaker_stats().items()):
+        if breaker.state == "open":
+            st.warning(f"**{host}** is not responding. Its pages are skipped for the next {breaker.retry_in:.0f}s.")
+        elif breaker.state == "half_open":
+            st.info(f"**{host}** was not responding. Checking whether it has recovered...")
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def poll_job(job: ScrapeJob) -> None:
+    """
+    Re-renders a running scrape's progress every JOB_POLL_INTERVAL seconds, and reruns the whole app once it has
+    finished.
+
+    Args:
+        job: The running scrape.
+
+    Returns:
+        None
+    """
+    render_progress(job)
+
+    pool = get_driver_pool()
+    admission = pool.admission.stats()
+    st.caption(f"Browsers in use: {admission.active}/{pool.size} · Waiting for a browser: {admission.queued} · "
+               f"Average wait: {admission.average_wait:.1f}s · "
+               f"Browser memory: {admission.browser_rss / 2 ** 20:.0f} MiB")
+
+    render_unavailable_hosts()
+
+    if not job.running:
+        st.rerun()
+
+
+@st.fragment
+def select_articles(job: ScrapeJob) -> None:
+    """
+    Renders the list of a finished scrape's articles and queues the download of the selected ones.
+
+    Args:
+        job: The finished scrape.
+
+    Returns:
+        None
+    """
+    column_configuration = {
+        "Date": st.column_config.DatetimeColumn(
+            width="small",
+            format="MM/DD/YYYY"
+        ),
+        "Posted": st.column_config.DatetimeColumn(
+            width="small",
+            format="MM/DD/YYYY"
+        ),
+        "Headline": st.column_config.TextColumn(
+            width="large"
+        ),
+        "URL": None
+    }
+
+    st.write("Select which articles you would like to download:")
+
+    all_articles = st.dataframe(
+        data=job.articles,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        column_config=column_configuration
+    )
 
-            article_indexes = all_articles.selection.rows
-            filtered_articles = articles.iloc[article_indexes]
+    article_indexes = all_articles.selection.rows
+    filtered_articles = job.articles.iloc[article_indexes]
 
-            if st.button("Download Selected Articles"):
-                download_articles(filtered_articles, zip_buffer)
-                st.session_state.submitted = True
+    if st.button("Download Selected Articles"):
+        scheduler.submit_articles(job.id, filtered_articles)
+        st.rerun()
 
-            if st.session_state.submitted:
-                st.download_button(
-                    "Download PDFs",
-                    file_name=f"{team_name}.zip",
-                    mime="application/zip",
-                    data=zip_buffer
-                )
 
-                del st.session_state.submitted
+# The scrape runs in the background, so its progress and results survive reruns and widget interactions.
+if "job_id" in st.session_state:
+    job = scheduler.get(st.session_state.job_id)
 
-        if articles is not None:
-            select_articles()
-        else:
-            st.write("No articles could be found.")
+    if job is None:
+        st.write("This scrape's results have expired. Please scrape again.")
+        del st.session_state.job_id
+    elif job.running:
+        poll_job(job)
     else:
-        st.download_button(
-            "Download PDFs",
-            file_name=f"{team_name}.zip",
-            mime="application/zip",
-            data=zip_buffer
-        )
+        render_progress(job)
+        render_unavailable_hosts()
+
+        if job.status == "awaiting_articles":
+            select_articles(job)
+        else:
+            if ("Articles" in job.artifacts) and (job.articles is None):
+                st.write("No articles could be found.")
+
+            st.download_button(
+                "Download PDFs",
+                file_name=f"{job.team_name}.zip",
+                mime="application/zip",
+                data=job.archive.download_file()
+            )
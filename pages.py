@@ -0,0 +1,521 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from typing import Iterator, NamedTuple
+
+from selenium import webdriver
+from selenium.common import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.wait import WebDriverWait
+
+from config import BLOCK_REQUESTS, PAGE_LOAD_TIMEOUT, PAGE_READY_TIMEOUT
+from driver_pool import PooledChrome
+from ratelimit import HostLimiter, get_host_limiter, throttle
+from resilience import call_with_retries, get_breaker, time_left
+
+logger = logging.getLogger(__name__)
+
+
+# URL patterns, in the wildcard syntax of CDP's Network.setBlockedURLs, of requests no scraper needs.
+TRACKER_URLS = (
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*adservice.google.com*", "*amazon-adsystem.com*", "*adnxs.com*", "*connect.facebook.net*",
+    "*scorecardresearch.com*", "*quantserve.com*", "*taboola.com*", "*outbrain.com*", "*hotjar.com*",
+    "*nr-data.net*", "*js-agent.newrelic.com*",
+)
+WIDGET_URLS = (
+    "*satisfi*", "*transcend.io*", "*transcend-cdn.com*", "*termly.io*", "*onetrust.com*", "*cookielaw.org*",
+    "*platform.twitter.com*", "*instagram.com/embed*",
+)
+MEDIA_URLS = ("*.mp4*", "*.webm*", "*.m3u8*", "*youtube.com/embed*", "*player.vimeo.com*")
+IMAGE_URLS = ("*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.svg*", "*.ico*")
+FONT_URLS = ("*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+             "*use.typekit.net*")
+
+# Pages that are only parsed need nothing but their markup and scripts.
+PARSE_BLOCKLIST = TRACKER_URLS + WIDGET_URLS + MEDIA_URLS + IMAGE_URLS + FONT_URLS
+
+# Pages that are printed keep their images and fonts so that the PDF looks like the page.
+PRINT_BLOCKLIST = TRACKER_URLS + WIDGET_URLS + MEDIA_URLS
+
+# Removes the chat and consent overlays that are rendered inline and so cannot be blocked at the network layer.
+REMOVE_OVERLAYS_SCRIPT = """
+    for (const id of ['divSatisfiChat', 'transcend-consent-manager', 'termly-code-snippet-support']) {
+        const removed = document.getElementById(id);
+        if (removed) removed.parentNode.removeChild(removed);
+    }
+"""
+
+# Sums what the current page downloaded, as reported by the Resource Timing API, and reads the status code of the
+# document's response. Cross-origin resources that do not send Timing-Allow-Origin report a size of 0.
+MEASURE_PAGE_SCRIPT = """
+    const navigation = performance.getEntriesByType('navigation');
+    const entries = navigation.concat(performance.getEntriesByType('resource'));
+    return [
+        entries.length,
+        entries.reduce((total, entry) => total + (entry.transferSize || 0), 0),
+        navigation.length ? navigation[0].responseStatus || null : null,
+    ];
+"""
+
+
+class UpstreamStatusError(WebDriverException):
+    """
+    Raised when a page the browser navigated to answered 429 or a 5xx status.
+    """
+
+
+class PageProfile(NamedTuple):
+    ready_selector: str
+    artifact: str
+    timeout: float = PAGE_READY_TIMEOUT
+    blocked_urls: tuple[str, ...] = PARSE_BLOCKLIST
+    remove_overlays: bool = False
+
+
+class PageLoadStats(NamedTuple):
+    pages: int
+    requests: int
+    bytes: int
+    seconds: float
+    blocked: int
+
+
+# One readiness condition per kind of page the scrapers navigate to. A page is ready once an element matching
+# ready_selector exists in the DOM. The artifact decides how long the page stays fresh in the cache. Printed pages keep
+# the resources the PDF needs and have their overlays removed; every other page is only parsed.
+PAGE_PROFILES = {
+    "roster": PageProfile("table, .s-person-card, .sidearm-roster-player", "roster",
+                          blocked_urls=PRINT_BLOCKLIST, remove_overlays=True),
+    "schedule": PageProfile("table, .s-game-card, .sidearm-schedule-game", "schedule",
+                            blocked_urls=PRINT_BLOCKLIST, remove_overlays=True),
+    "generated_schedule": PageProfile("table", "schedule", blocked_urls=PRINT_BLOCKLIST),
+    "stats": PageProfile("embed, object", "stats"),
+    "boost_schedule": PageProfile("table tbody tr", "box_scores"),
+    "sidearm_calendar": PageProfile("table caption", "box_scores"),
+    "sidearm_box_score": PageProfile("#print-bar", "box_scores"),
+    "sidearm_box_score_preview": PageProfile("object", "box_scores"),
+    "archives_table": PageProfile("table", "articles"),
+    "archives_list": PageProfile("div.vue-archives-stories ul", "articles"),
+    "article": PageProfile("article, main", "article", blocked_urls=PRINT_BLOCKLIST, remove_overlays=True),
+}
+
+_load_stats: dict[str, PageLoadStats] = {}
+_load_stats_lock = threading.Lock()
+
+# Blocked requests read from the performance log whose page has not finished loading yet, by document URL.
+_blocked_requests: Counter = Counter()
+
+
+def wait_for_page(driver: webdriver.Chrome, page_kind: str) -> bool:
+    """
+    Waits until the current page satisfies the readiness condition declared for its kind.
+
+    Pages that never become ready are not treated as errors: the caller parses whatever has loaded, exactly as it
+    would have after a fixed sleep. The wait is capped to what is left of the deadline.
+
+    Args:
+        driver: Selenium webdriver instance.
+        page_kind: Key into PAGE_PROFILES.
+
+    Returns:
+        True if the page became ready before the timeout, False otherwise.
+    """
+    profile = PAGE_PROFILES[page_kind]
+    start = time.perf_counter()
+
+    try:
+        WebDriverWait(driver, time_left(profile.timeout), poll_frequency=0.1).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, profile.ready_selector)))
+        ready = True
+    except TimeoutException:
+        ready = False
+
+    logger.info("%s page %s after %.2fs: %s", page_kind, "ready" if ready else "not ready",
+                time.perf_counter() - start, driver.current_url)
+
+    return ready
+
+
+def load_page(driver: webdriver.Chrome, url: str, page_kind: str) -> bool:
+    """
+    Navigates to a URL with the requests its kind of page does not need blocked, and waits for the page to become
+    ready. Printed pages also have their overlays removed. The navigation holds one of the host's rate limiter slots
+    until the page is ready, goes through the host's circuit breaker, and is retried with backoff if it times out,
+    cannot connect or is answered with 429 or 5xx. Its page-load timeout is capped to what is left of the deadline.
+
+    Args:
+        driver: Selenium webdriver instance.
+        url: URL of the page.
+        page_kind: Key into PAGE_PROFILES.
+
+    Returns:
+        True if the page became ready before the timeout, False otherwise.
+
+    Raises:
+        WebDriverException: If every attempt failed, the host is skipped by its circuit breaker, or the deadline has
+            passed.
+    """
+    block_urls(driver, page_kind)
+
+    def attempt() -> bool:
+        with throttle(url) as limiter:
+            start = time.perf_counter()
+            driver.set_page_load_timeout(time_left(PAGE_LOAD_TIMEOUT))
+
+            try:
+                driver.get(url)
+                ready = wait_for_page(driver, page_kind)
+                status = finish_page_load(driver, page_kind, start)
+            finally:
+                driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+
+            limiter.observe(status)
+
+        check_navigation_status(url, status)
+        return ready
+
+    return call_with_retries(url, attempt, is_transient_navigation_error, WebDriverException)
+
+
+def check_navigation_status(url: str, status: int | None) -> None:
+    """
+    Fails a navigation whose page was answered with a status asking to come back later.
+
+    Args:
+        url: URL of the page.
+        status: HTTP status code of the page, or None if the browser does not report it.
+
+    Returns:
+        None
+
+    Raises:
+        UpstreamStatusError: If the status is 429 or 5xx.
+    """
+    if (status is not None) and ((status == 429) or (status >= 500)):
+        raise UpstreamStatusError(f"{url} answered {status}.")
+
+
+def is_transient_navigation_error(error: Exception) -> bool:
+    """
+    Checks whether a failed navigation is worth retrying.
+
+    Args:
+        error: The exception the navigation raised.
+
+    Returns:
+        True for page-load timeouts, network errors and pages answered with 429 or 5xx.
+    """
+    if isinstance(error, (TimeoutException, UpstreamStatusError)):
+        return True
+
+    return isinstance(error, WebDriverException) and ("net::ERR_" in (error.msg or ""))
+
+
+def load_pages_in_tabs(driver: webdriver.Chrome, urls: list[str], page_kind: str, tabs: int,
+                       timeout: float) -> Iterator[tuple[str, str | None]]:
+    """
+    Loads several pages at once, each in its own tab of the same browser, and hands them back one at a time.
+
+    The tabs are opened and navigated from the driver's current tab, which never navigates itself, so that the driver
+    is not held up by the pages that are still loading. Up to `tabs` pages load at once, as long as their host's rate
+    limiter has slots to spare; as soon as one has been handed back and its tab closed, the next URL starts loading.
+    Pages are not retried, but their outcome counts towards their host's circuit breaker, and pages of a host whose
+    breaker is open are skipped without being loaded.
+
+    Args:
+        driver: Selenium webdriver instance.
+        urls: URLs of the pages.
+        page_kind: Key into PAGE_PROFILES.
+        tabs: Maximum number of pages loading at once.
+        timeout: Seconds a page may take to load before it is given up on.
+
+    Returns:
+        An iterator of (url, error) pairs in the order the URLs were given. While a pair is being processed, the
+        driver is switched to that page's tab. error is None if the page loaded, and otherwise says why it timed out,
+        was answered with an error, was skipped or its tab crashed, in which case the page should not be used.
+    """
+    controller = driver.current_window_handle
+    pending = deque(urls)
+    # Pages that are skipped without being loaded have no tab, and the reason they were skipped instead of a limiter.
+    loading: deque[tuple[str, str | None, float, HostLimiter | str]] = deque()
+
+    page_load_timeout = driver.timeouts.page_load
+
+    try:
+        while pending or loading:
+            while pending and (len(loading) < tabs):
+                # The tabs already loading only release their slots once they are waited on below, so only wait for a
+                # slot when nothing is loading.
+                limiter = get_host_limiter(pending[0])
+                if not limiter.acquire(blocking=not loading, timeout=time_left(None)):
+                    if loading:
+                        break
+
+                    # The deadline passed while waiting for a slot, so the page is skipped.
+                    loading.append((pending.popleft(), None, time.perf_counter(),
+                                    "The scrape ran past its deadline before the page could be loaded."))
+                    continue
+
+                url = pending.popleft()
+
+                breaker = get_breaker(url)
+                if not breaker.allow():
+                    # Skipped pages keep their place in the queue so that pages are still handed back in order.
+                    limiter.release()
+                    loading.append((url, None, time.perf_counter(),
+                                    f"{breaker.host} is failing, skipping it for {breaker.stats().retry_in:.0f}s."))
+                    continue
+                try:
+                    handle = open_loading_tab(driver, controller, url, page_kind)
+                except BaseException:
+                    limiter.release()
+                    raise
+
+                loading.append((url, handle, time.perf_counter(), limiter))
+
+            url, handle, start, limiter = loading.popleft()
+
+            if handle is None:
+                logger.info("%s page skipped: %s (%s)", page_kind, url, limiter)
+                yield url, limiter
+                continue
+
+            breaker = get_breaker(url)
+
+            try:
+                driver.switch_to.window(handle)
+
+                # The first command sent to the tab waits for its page to load, for whatever is left of its timeout.
+                driver.set_page_load_timeout(time_left(max(timeout - (time.perf_counter() - start), 0.1)))
+
+                driver.execute_script("return document.readyState;")
+                wait_for_page(driver, page_kind)
+
+                status = finish_page_load(driver, page_kind, start)
+                limiter.observe(status)
+                check_navigation_status(url, status)
+
+                breaker.record_success()
+                error = None
+            except TimeoutException:
+                error = f"The page did not load within {time.perf_counter() - start:.0f} seconds."
+                breaker.record_failure()
+            except WebDriverException as e:
+                error = e.msg or type(e).__name__
+                if is_transient_navigation_error(e):
+                    breaker.record_failure()
+            finally:
+                limiter.release()
+
+            if error is not None:
+                logger.info("%s page failed after %.2fs: %s (%s)", page_kind, time.perf_counter() - start, url, error)
+
+            yield url, error
+
+            close_tab(driver, handle, controller)
+    finally:
+        for _, handle, _, limiter in loading:
+            if handle is not None:
+                limiter.release()
+                close_tab(driver, handle, controller)
+
+        driver.set_page_load_timeout(page_load_timeout)
+
+
+def open_loading_tab(driver: webdriver.Chrome, controller: str, url: str, page_kind: str) -> str:
+    """
+    Opens a tab with the requests its kind of page does not need blocked, and starts loading a URL in it without
+    waiting for the page.
+
+    Args:
+        driver: Selenium webdriver instance, switched to the controller tab.
+        controller: Handle of the tab the new tab is opened and navigated from.
+        url: URL of the page.
+        page_kind: Key into PAGE_PROFILES.
+
+    Returns:
+        The new tab's window handle. The driver is switched back to the controller tab.
+    """
+    known_handles = set(driver.window_handles)
+    driver.execute_script("(window.scraperTabs = window.scraperTabs || []).push(window.open('about:blank'));")
+    handle = (set(driver.window_handles) - known_handles).pop()
+
+    driver.switch_to.window(handle)
+    block_urls(driver, page_kind)
+    driver.switch_to.window(controller)
+
+    # The navigation belongs to the new tab, so the driver does not wait for it while it stays on the controller tab.
+    driver.execute_script("window.scraperTabs[window.scraperTabs.length - 1].location.href = arguments[0];", url)
+
+    if isinstance(driver, PooledChrome):
+        driver.record_navigation(url)
+
+    return handle
+
+
+def close_tab(driver: webdriver.Chrome, handle: str, controller: str) -> None:
+    """
+    Closes a tab opened by open_loading_tab and switches back to the controller tab.
+
+    Args:
+        driver: Selenium webdriver instance.
+        handle: Handle of the tab to close.
+        controller: Handle of the controller tab.
+
+    Returns:
+        None
+    """
+    try:
+        driver.switch_to.window(handle)
+        driver.close()
+    except WebDriverException:
+        # A tab that crashed or timed out is cleaned up when the driver is reset.
+        pass
+
+    driver.switch_to.window(controller)
+
+
+def block_urls(driver: webdriver.Chrome, page_kind: str) -> None:
+    """
+    Blocks, in the driver's current tab, the requests a kind of page does not need.
+
+    Args:
+        driver: Selenium webdriver instance.
+        page_kind: Key into PAGE_PROFILES.
+
+    Returns:
+        None
+    """
+    blocked_urls = list(PAGE_PROFILES[page_kind].blocked_urls) if BLOCK_REQUESTS else []
+
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+
+
+def finish_page_load(driver: webdriver.Chrome, page_kind: str, start: float) -> int | None:
+    """
+    Removes the overlays of a printed page and records what loading the page cost and how many of its requests were
+    blocked.
+
+    Args:
+        driver: Selenium webdriver instance, switched to the loaded page.
+        page_kind: Key into PAGE_PROFILES.
+        start: time.perf_counter() value from when the page started loading.
+
+    Returns:
+        The HTTP status code of the page, or None if the browser does not report it.
+    """
+    if PAGE_PROFILES[page_kind].remove_overlays:
+        driver.execute_script(REMOVE_OVERLAYS_SCRIPT)
+
+    requests, transferred, status = driver.execute_script(MEASURE_PAGE_SCRIPT)
+    record_page_load(page_kind, requests, transferred, time.perf_counter() - start,
+                     count_blocked_requests(driver, driver.current_url))
+
+    return status
+
+
+def set_page_content(driver: webdriver.Chrome, html: str, page_kind: str) -> bool:
+    """
+    Replaces the browser's current document with generated HTML, without writing it to disk or serving it.
+
+    The browser first moves to about:blank so that scripts of the previous page cannot touch the new document.
+
+    Args:
+        driver: Selenium webdriver instance.
+        html: The full HTML document.
+        page_kind: Key into PAGE_PROFILES.
+
+    Returns:
+        True if the document became ready before the timeout, False otherwise.
+    """
+    driver.get("about:blank")
+
+    frame_id = driver.execute_cdp_cmd("Page.getFrameTree", {})["frameTree"]["frame"]["id"]
+    driver.execute_cdp_cmd("Page.setDocumentContent", {"frameId": frame_id, "html": html})
+
+    return wait_for_page(driver, page_kind)
+
+
+def count_blocked_requests(driver: webdriver.Chrome, document_url: str) -> int:
+    """
+    Counts the requests of a page that the blocklist stopped, from the network events in the browser's performance
+    log. The log is shared by every tab of the browser, so the events of pages still loading in other tabs are kept
+    until those pages are measured.
+
+    Args:
+        driver: Selenium webdriver instance.
+        document_url: URL of the page's document.
+
+    Returns:
+        The number of blocked requests, 0 if blocking is off or the browser keeps no performance log.
+    """
+    if not BLOCK_REQUESTS:
+        return 0
+
+    try:
+        log = driver.get_log("performance")
+    except WebDriverException:
+        return 0
+
+    documents = {}
+    blocked = []
+    for log_entry in log:
+        message = json.loads(log_entry["message"])["message"]
+        params = message.get("params", {})
+
+        if message.get("method") == "Network.requestWillBeSent":
+            documents[params.get("requestId")] = params.get("documentURL")
+        elif (message.get("method") == "Network.loadingFailed") and params.get("blockedReason"):
+            blocked.append(params.get("requestId"))
+
+    with _load_stats_lock:
+        _blocked_requests.update(documents.get(request_id) for request_id in blocked)
+        count = _blocked_requests.pop(document_url, 0)
+
+        # Pages that never got measured, ie: because they crashed, would otherwise be kept forever.
+        if len(_blocked_requests) > 1000:
+            _blocked_requests.clear()
+
+    return count
+
+
+def record_page_load(page_kind: str, requests: int, transferred: int, seconds: float, blocked: int) -> None:
+    """
+    Adds a page load to the per-kind totals.
+
+    Args:
+        page_kind: Key into PAGE_PROFILES.
+        requests: Number of requests the page made that were not blocked.
+        transferred: Bytes those requests downloaded.
+        seconds: Seconds the navigation took, including the wait for readiness.
+        blocked: Number of requests the blocklist stopped.
+
+    Returns:
+        None
+    """
+    logger.info("%s page loaded %d bytes over %d requests in %.2fs, %d blocked (blocking %s)", page_kind,
+                transferred, requests, seconds, blocked, "on" if BLOCK_REQUESTS else "off")
+
+    with _load_stats_lock:
+        totals = _load_stats.get(page_kind, PageLoadStats(0, 0, 0, 0.0, 0))
+        _load_stats[page_kind] = PageLoadStats(totals.pages + 1, totals.requests + requests,
+                                               totals.bytes + transferred, totals.seconds + seconds,
+                                               totals.blocked + blocked)
+
+
+def get_page_load_stats() -> dict[str, PageLoadStats]:
+    """
+    Returns how many pages of each kind were loaded, the requests, bytes and time of what they still loaded, and how
+    many requests the blocklists stopped, in total. Blocked requests are never sent, so the bytes and time they save
+    can only be measured by comparing runs with NU_SCRAPER_BLOCK_REQUESTS on and off.
+
+    Returns:
+        Mapping of page kind to its totals.
+    """
+    with _load_stats_lock:
+        return dict(_load_stats)
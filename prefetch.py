@@ -0,0 +1,120 @@
+import datetime as dt
+import functools
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from admission import AdmissionCancelled, BackgroundWork, running_in_background
+from archive import ArchiveWriter
+from articles import fetch_articles
+from conference import get_conference_box_scores
+from config import PREFETCH_WORKERS
+from fetch import fetch_page, get_fetch_strategy
+from schedule import download_schedule
+from stats import stats_page_url
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+
+
+class Prefetch:
+    """
+    Background warm-up of the pages and PDFs a team's scrape is likely to need. Its browser leases wait behind every
+    real scrape's, and it can be cancelled between steps or while a step waits for a browser.
+    """
+
+    def __init__(self, team_name: str, steps: dict[str, Callable[[], object]]) -> None:
+        """
+        Queues the steps on the shared prefetch pool.
+
+        Args:
+            team_name: Name of the team being prefetched.
+            steps: Mapping of step name to a callable that performs it, run in order.
+        """
+        self.team_name = team_name
+        self._work = BackgroundWork()
+        self._future: Future = _executor.submit(self._run, steps)
+
+    def cancel(self) -> None:
+        """
+        Stops the prefetch. A step waiting for a browser gives up and no further step starts, but a page load that is
+        already under way, or a step a real scrape is sharing, finishes.
+
+        Returns:
+            None
+        """
+        self._work.cancel()
+        self._future.cancel()
+
+    def _run(self, steps: dict[str, Callable[[], object]]) -> None:
+        for name, step in steps.items():
+            if self._work.cancelled:
+                logger.info("Prefetch of %s cancelled before %s", self.team_name, name)
+                return
+
+            start = time.perf_counter()
+            try:
+                with running_in_background(self._work):
+                    step()
+                logger.info("Prefetched %s %s in %.2fs", self.team_name, name, time.perf_counter() - start)
+            except AdmissionCancelled:
+                logger.info("Prefetch of %s cancelled during %s", self.team_name, name)
+                return
+            except Exception as e:
+                logger.info("Prefetching %s %s failed: %s", self.team_name, name, e)
+
+
+def start_prefetch(team_data: dict, years: list[str], date_range: tuple[dt.date, dt.date]) -> Prefetch:
+    """
+    Starts warming the caches a scrape of a team reads from: the conference schedule index, the stats pages, the
+    printed schedule and the article index. The steps go through the same coalesced functions and caches as the
+    scrape, so a scrape started while a step is still running shares it.
+
+    Args:
+        team_data: Dictionary containing team data.
+        years: Years whose stats pages are fetched.
+        date_range: Range of dates the article index is updated for.
+
+    Returns:
+        The running prefetch.
+    """
+    steps = {
+        "conference schedule": functools.partial(get_conference_box_scores, team_data,
+                                                 get_fetch_strategy(team_data, "box_scores")),
+    }
+
+    for year in years:
+        try:
+            url = stats_page_url(team_data, year)
+        except KeyError:
+            # download_stats reports the missing URL when the scrape runs.
+            continue
+
+        steps[f"{year} stats page"] = functools.partial(fetch_page, url, "stats",
+                                                        get_fetch_strategy(team_data, "stats"))
+
+    steps["schedule"] = functools.partial(warm_archive, download_schedule, team_data["name"],
+                                          team_data["schedule_url"], f"{team_data['abbreviation']} Schedule.pdf")
+    steps["articles"] = functools.partial(fetch_articles, team_data, date_range)
+
+    return Prefetch(team_data["name"], steps)
+
+
+def warm_archive(function: Callable, *args) -> None:
+    """
+    Runs a download function into a throwaway archive, for the caches it fills along the way.
+
+    Args:
+        function: The download function, taking the archive as its last argument.
+        *args: The function's other arguments.
+
+    Returns:
+        None
+    """
+    archive = ArchiveWriter()
+    try:
+        function(*args, archive)
+    finally:
+        archive.close()
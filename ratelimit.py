@@ -0,0 +1,238 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple
+from urllib.parse import urlsplit
+
+from config import HOST_CONCURRENCY, HOST_REQUESTS_PER_SECOND
+from resilience import DeadlineExceeded, time_left
+
+logger = logging.getLogger(__name__)
+
+# Status codes with which an upstream asks to be sent fewer requests.
+THROTTLE_STATUSES = {429, 503}
+
+# Seconds a throttled host is left alone when its response has no usable Retry-After header.
+THROTTLE_COOLDOWN = 5.0
+
+# A throttled host's rate is halved down to this fraction of the configured rate at most.
+MIN_RATE_FRACTION = 1 / 16
+
+# Fraction of the configured rate a host's rate recovers by with every successful request.
+RECOVERY_FRACTION = 1 / 10
+
+
+class HostLimitStats(NamedTuple):
+    active: int
+    rate: float
+    throttles: int
+    paused_for: float
+
+
+class HostLimiter:
+    """
+    Token bucket and concurrency cap for one host. The rate is halved every time the host answers 429 or 503, which
+    also pauses the host for its Retry-After, and creeps back to the configured rate as requests succeed.
+    """
+
+    def __init__(self, host: str, concurrency: int, rate: float) -> None:
+        """
+        Initializes a limiter with a full bucket.
+
+        Args:
+            host: The host, used in log messages.
+            concurrency: Maximum number of requests in flight to the host at once.
+            rate: Requests per second sent to the host. 0 disables the token bucket.
+        """
+        self.host = host
+        self.max_rate = rate
+        self.rate = rate
+
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._tokens = max(rate, 1.0)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._active = 0
+        self._throttles = 0
+
+    def acquire(self, blocking: bool = True, timeout: float | None = None) -> bool:
+        """
+        Waits for a free slot and a token. Every successful acquire must be paired with a release.
+
+        Args:
+            blocking: Wait for a slot to free up. If False, give up at once when every slot is taken, ie: when the
+                caller itself holds slots that are only released later.
+            timeout: Optional seconds to wait for the slot and the token together.
+
+        Returns:
+            True if a slot was taken, False if none was free and blocking is False, or the timeout ran out.
+        """
+        due = None if timeout is None else time.monotonic() + timeout
+
+        if not (self._slots.acquire(timeout=timeout) if blocking else self._slots.acquire(False)):
+            return False
+
+        try:
+            while (delay := self._take_token()) > 0:
+                if (due is not None) and (time.monotonic() + delay > due):
+                    self._slots.release()
+                    return False
+
+                time.sleep(delay)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._active += 1
+
+        return True
+
+    def release(self) -> None:
+        """
+        Frees the slot taken by acquire.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._active -= 1
+
+        self._slots.release()
+
+    def observe(self, status: int | None, retry_after: str | None = None) -> None:
+        """
+        Adapts the host's rate to the status of a response it sent.
+
+        Args:
+            status: HTTP status code of the response, or None if it is unknown.
+            retry_after: The response's Retry-After header, if any.
+
+        Returns:
+            None
+        """
+        if (status is None) or (self.max_rate <= 0):
+            return
+
+        with self._lock:
+            if status in THROTTLE_STATUSES:
+                self.rate = max(self.rate / 2, self.max_rate * MIN_RATE_FRACTION)
+                self._tokens = 0.0
+                self._throttles += 1
+
+                cooldown = parse_retry_after(retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + cooldown)
+
+                logger.warning("%s answered %d, slowing down to %.2f requests/s for at least %.1fs", self.host, status,
+                               self.rate, cooldown)
+            elif status < 400:
+                self.rate = min(self.rate + self.max_rate * RECOVERY_FRACTION, self.max_rate)
+
+    def stats(self) -> HostLimitStats:
+        """
+        Returns a snapshot of the limiter's state.
+
+        Returns:
+            The number of requests in flight, the current rate, how many times the host has answered 429 or 503 and the
+            seconds left in the pause that followed.
+        """
+        with self._lock:
+            return HostLimitStats(self._active, self.rate, self._throttles,
+                                  max(self._paused_until - time.monotonic(), 0.0))
+
+    def _take_token(self) -> float:
+        if self.max_rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            self._tokens = min(self._tokens + (now - self._refilled_at) * self.rate, max(self.rate, 1.0))
+            self._refilled_at = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+
+            return (1 - self._tokens) / self.rate
+
+
+_limiters: dict[str, HostLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(url: str) -> HostLimiter:
+    """
+    Returns the limiter shared by every request to a URL's host, creating it on first use.
+
+    Args:
+        url: Any URL of the host.
+
+    Returns:
+        The host's limiter.
+    """
+    host = urlsplit(url).netloc.lower()
+
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = HostLimiter(host, HOST_CONCURRENCY, HOST_REQUESTS_PER_SECOND)
+
+    return limiter
+
+
+@contextmanager
+def throttle(url: str) -> Iterator[HostLimiter]:
+    """
+    Holds one of the slots of a URL's host for the duration of a request, once the host's rate allows it.
+
+    Args:
+        url: URL about to be requested.
+
+    Returns:
+        A context manager yielding the host's limiter, which the response's status should be reported to.
+
+    Raises:
+        DeadlineExceeded: If the current deadline passes before the host has a slot and a token for the request.
+    """
+    limiter = get_host_limiter(url)
+    if not limiter.acquire(timeout=time_left(None)):
+        raise DeadlineExceeded(f"the scrape ran past its deadline waiting for a {limiter.host} slot.")
+
+    try:
+        yield limiter
+    finally:
+        limiter.release()
+
+
+def get_host_limit_stats() -> dict[str, HostLimitStats]:
+    """
+    Returns the state of every host requested so far.
+
+    Returns:
+        Mapping of host to its limiter's state.
+    """
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+
+    return {limiter.host: limiter.stats() for limiter in limiters}
+
+
+def parse_retry_after(retry_after: str | None) -> float:
+    """
+    Reads a Retry-After header given in seconds. HTTP dates and missing headers fall back to THROTTLE_COOLDOWN.
+
+    Args:
+        retry_after: The header's value.
+
+    Returns:
+        Seconds to wait before the next request, capped to a minute.
+    """
+    try:
+        return min(max(float(retry_after), 0.0), 60.0)
+    except (TypeError, ValueError):
+        return THROTTLE_COOLDOWN
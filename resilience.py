@@ -0,0 +1,283 @@
+import contextvars
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple, TypeVar
+from urllib.parse import urlsplit
+
+from config import (ARTIFACT_DEADLINES, BREAKER_COOLDOWN, BREAKER_FAILURES, RETRY_ATTEMPTS, RETRY_BACKOFF,
+                    RETRY_MAX_BACKOFF)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised when a wait bounded by the current deadline runs out of time.
+    """
+
+
+class BreakerStats(NamedTuple):
+    state: str
+    failures: int
+    trips: int
+    retry_in: float
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of one host. After `threshold` consecutive failures the breaker opens and every request to the
+    host fails at once for `cooldown` seconds. A single trial request is then let through: the breaker closes if it
+    succeeds and opens again if it fails.
+    """
+
+    def __init__(self, host: str, threshold: int, cooldown: float) -> None:
+        """
+        Initializes a closed breaker.
+
+        Args:
+            host: The host, used in log messages.
+            threshold: Number of consecutive failures that open the breaker. 0 disables the breaker.
+            cooldown: Seconds the breaker stays open before a trial request is let through.
+        """
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._consecutive_failures = 0
+        self._failures = 0
+        self._trips = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        """
+        Checks whether a request to the host may be sent.
+
+        Returns:
+            True if the breaker is closed, or if it has cooled down and this request is its trial.
+        """
+        with self._lock:
+            if self._state == "closed":
+                return True
+
+            # A trial that never reported back is replaced by a new one after another cooldown.
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = "half_open"
+                self._opened_at = time.monotonic()
+                return True
+
+            return False
+
+    def record_success(self) -> None:
+        """
+        Records a request the host answered, closing the breaker.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            if self._state != "closed":
+                logger.info("%s is responding again, closing its circuit breaker", self.host)
+
+            self._state = "closed"
+            self._consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        """
+        Records a request that failed for a reason that may be the host's, opening the breaker once there are enough
+        in a row.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._failures += 1
+            self._consecutive_failures += 1
+
+            if self.threshold <= 0:
+                return
+
+            if (self._state == "half_open") or (self._consecutive_failures >= self.threshold):
+                if self._state != "open":
+                    self._trips += 1
+                    logger.warning("%s failed %d time(s) in a row, skipping it for %.0fs", self.host,
+                                   self._consecutive_failures, self.cooldown)
+
+                self._state = "open"
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> BreakerStats:
+        """
+        Returns a snapshot of the breaker's state.
+
+        Returns:
+            The state ("closed", "open" or "half_open"), the total number of failures, how many times the breaker
+            opened and the seconds left before an open breaker lets a trial request through.
+        """
+        with self._lock:
+            retry_in = max(self.cooldown - (time.monotonic() - self._opened_at), 0.0) if self._state == "open" else 0.0
+            return BreakerStats(self._state, self._failures, self._trips, retry_in)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """
+    Returns the circuit breaker shared by every request to a URL's host, creating it on first use.
+
+    Args:
+        url: Any URL of the host.
+
+    Returns:
+        The host's breaker.
+    """
+    host = urlsplit(url).netloc.lower()
+
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host, BREAKER_FAILURES, BREAKER_COOLDOWN)
+
+    return breaker
+
+
+def get_breaker_stats() -> dict[str, BreakerStats]:
+    """
+    Returns the state of every host requested so far.
+
+    Returns:
+        Mapping of host to its breaker's state.
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+
+    return {breaker.host: breaker.stats() for breaker in breakers}
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """
+    Bounds the time the requests made in this context may take. An enclosing deadline that is sooner still applies.
+
+    Args:
+        seconds: Seconds from now the deadline falls.
+
+    Returns:
+        A context manager that restores the previous deadline on exit.
+    """
+    due = time.monotonic() + seconds
+    enclosing = _deadline.get()
+
+    token = _deadline.set(due if enclosing is None else min(due, enclosing))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def with_deadline(artifact: str, function: Callable[[], T]) -> Callable[[], T]:
+    """
+    Wraps a scrape job so that it runs under its artifact's deadline.
+
+    Args:
+        artifact: Key into ARTIFACT_DEADLINES.
+        function: The job.
+
+    Returns:
+        A callable running the job under the deadline.
+    """
+    def run() -> T:
+        with deadline(ARTIFACT_DEADLINES[artifact]):
+            return function()
+
+    return run
+
+
+def time_left(limit: float | None) -> float | None:
+    """
+    Caps a timeout to the time left before the current deadline.
+
+    Args:
+        limit: The timeout to use when no deadline is set or it is further away. None for no timeout.
+
+    Returns:
+        The capped timeout in seconds, never below 0.1 so that a timeout of 0 is not mistaken for none, or None if
+        neither a limit nor a deadline is set.
+    """
+    due = _deadline.get()
+    if due is None:
+        return limit
+
+    remaining = due - time.monotonic()
+    return max(remaining if limit is None else min(limit, remaining), 0.1)
+
+
+def call_with_retries(url: str, attempt: Callable[[], T], is_transient: Callable[[Exception], bool],
+                      unavailable: Callable[[str], Exception],
+                      is_answered: Callable[[Exception], bool] | None = None) -> T:
+    """
+    Runs a request to a URL through its host's circuit breaker, retrying transient failures with jittered exponential
+    backoff up to RETRY_ATTEMPTS times, as long as the current deadline leaves time for it. Only attempts the host
+    answered, even with an error, count towards its health.
+
+    Args:
+        url: URL being requested.
+        attempt: Callable sending the request once.
+        is_transient: Callable deciding whether an exception raised by attempt is worth retrying and counts against
+            the host's health.
+        unavailable: Callable building the exception raised when the host's breaker is open or the deadline has
+            passed, from its message. It should be the exception type the callers already handle.
+        is_answered: Optional callable deciding whether a non-transient exception raised by attempt is the host's
+            answer, ie: a 404, which shows the host is healthy. Other non-transient exceptions, ie: from a crashed
+            browser, leave the breaker as it is.
+
+    Returns:
+        The result of the first successful attempt.
+
+    Raises:
+        Exception: The last attempt's exception, or the one built by unavailable.
+    """
+    breaker = get_breaker(url)
+    attempts = max(RETRY_ATTEMPTS, 1)
+
+    for attempt_number in range(1, attempts + 1):
+        due = _deadline.get()
+        if (due is not None) and (time.monotonic() >= due):
+            raise unavailable(f"Gave up on {url}: the scrape ran past its deadline.")
+
+        if not breaker.allow():
+            raise unavailable(f"{breaker.host} is failing, skipping it for {breaker.stats().retry_in:.0f}s.")
+
+        try:
+            result = attempt()
+        except DeadlineExceeded as e:
+            raise unavailable(f"Gave up on {url}: {e}") from e
+        except Exception as e:
+            if not is_transient(e):
+                if (is_answered is not None) and is_answered(e):
+                    # The host answered, so it is healthy even though the request failed.
+                    breaker.record_success()
+                raise
+
+            breaker.record_failure()
+
+            delay = random.uniform(0, min(RETRY_BACKOFF * 2 ** (attempt_number - 1), RETRY_MAX_BACKOFF))
+            if (attempt_number == attempts) or ((due is not None) and (time.monotonic() + delay >= due)):
+                raise
+
+            logger.info("Attempt %d at %s failed, retrying in %.2fs: %s", attempt_number, url, delay, e)
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
@@ -1,47 +1,35 @@
-import time
-from io import BytesIO
-
-import streamlit as st
 from selenium.common import TimeoutException, WebDriverException
 
-from utils import initialize_web_driver, print_pdf_to_zipfile
+import events
+from archive import ArchiveWriter
+from coalesce import coalesced
+from driver_pool import borrow_driver
+from pages import load_page
+from utils import cached_print_to_zipfile, print_pdf_to_zipfile
 
 
-def download_roster(url: str, filename: str, zip_buffer: BytesIO) -> None:
+@coalesced("roster")
+def download_roster(url: str, filename: str, archive: ArchiveWriter) -> None:
     """
     Downloads the roster page to a PDF file.
 
     Args:
         url: URL of the site.
         filename: Name of the downloaded file.
-        zip_buffer: Bytes buffer containing the roster page.
+        archive: Archive to write the PDF file to.
 
     Returns:
         None
     """
-    driver = initialize_web_driver()
-
-    script = """
-        let removed = document.getElementById('divSatisfiChat'); 
-        if (removed) removed.parentNode.removeChild(removed);
-
-        removed = document.getElementById('transcend-consent-manager'); 
-        if (removed) removed.parentNode.removeChild(removed);
-
-        removed = document.getElementById('termly-code-snippet-support'); 
-        if (removed) removed.parentNode.removeChild(removed);
-    """
-
-    try:
-        driver.get(url)
-        time.sleep(1)
-
-        driver.execute_script(script)
-
-        print_pdf_to_zipfile(driver, filename, zip_buffer)
-    except TimeoutException as e:
-        st.write(f"**{filename}** :x:  \nReason: {e.msg}")
-    except WebDriverException as e:
-        st.write(f"**{filename}** :x:  \nReason: {e.msg}")
-    finally:
-        driver.quit()
+    if cached_print_to_zipfile(url, filename, archive):
+        return
+
+    with borrow_driver() as driver:
+        try:
+            load_page(driver, url, "roster")
+
+            print_pdf_to_zipfile(driver, filename, archive, url, "roster")
+        except TimeoutException as e:
+            events.failed(filename, e.msg)
+        except WebDriverException as e:
+            events.failed(filename, e.msg)
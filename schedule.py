@@ -1,16 +1,19 @@
-import os
-import time
-from io import StringIO, BytesIO
+from io import StringIO
 
 import pandas as pd
-import streamlit as st
 from bs4 import BeautifulSoup
 from selenium.common import WebDriverException
 
-from utils import initialize_web_driver, sanitize_html, print_pdf_to_zipfile
+import events
+from archive import ArchiveWriter
+from coalesce import coalesced
+from driver_pool import borrow_driver
+from pages import load_page, set_page_content
+from utils import cached_print_to_zipfile, sanitize_html, print_pdf_to_zipfile
 
 
-def download_schedule(team_name: str, url: str, filename: str, zip_buffer: BytesIO) -> None:
+@coalesced("schedule")
+def download_schedule(team_name: str, url: str, filename: str, archive: ArchiveWriter) -> None:
     """
     Downloads the schedule page to a PDF file.
 
@@ -18,61 +21,44 @@ def download_schedule(team_name: str, url: str, filename: str, zip_buffer: Bytes
         team_name: Name of the team.
         url: URL of the site.
         filename: Name of the downloaded file.
-        zip_buffer: Bytes buffer containing the roster page.
+        archive: Archive to write the PDF file to.
 
     Returns:
         None
     """
-    driver = initialize_web_driver()
+    if cached_print_to_zipfile(url, filename, archive):
+        return
 
-    script = """
-        let removed = document.getElementById('divSatisfiChat'); 
-        if (removed) removed.parentNode.removeChild(removed);
+    with borrow_driver() as driver:
+        try:
+            load_page(driver, url, "schedule")
 
-        removed = document.getElementById('transcend-consent-manager'); 
-        if (removed) removed.parentNode.removeChild(removed);
+            scrape_schedule = [
+                "Northwestern",
+                "Indiana",
+                "Ohio State",
+                "UCLA",
+                "Michigan State",
+                "Michigan",
+                "DePaul"
+            ]
 
-        removed = document.getElementById('termly-code-snippet-support'); 
-        if (removed) removed.parentNode.removeChild(removed);
-    """
-
-    try:
-        driver.get(url)
-        time.sleep(1)
-
-        driver.execute_script(script)
-
-        scrape_schedule = [
-            "Northwestern",
-            "Indiana",
-            "Ohio State",
-            "UCLA",
-            "Michigan State",
-            "Michigan",
-            "DePaul"
-        ]
-
-        if team_name in scrape_schedule:
-            soup = BeautifulSoup(driver.page_source, "lxml")
-
-            extracted_tables = extract_tables(soup)
+            if team_name in scrape_schedule:
+                soup = BeautifulSoup(driver.page_source, "lxml")
 
-            if not extracted_tables:
-                raise ValueError(
-                    f"Could not find tables to extract. This is likely caused by the website's internal server error.  \n{url}")
+                extracted_tables = extract_tables(soup)
 
-            full_html = build_html_document(soup.find("title").text, extracted_tables)
+                if not extracted_tables:
+                    raise ValueError(
+                        f"Could not find tables to extract. This is likely caused by the website's internal server error.  \n{url}")
 
-            with open("temp.html", "w") as f:
-                f.write(full_html)
+                full_html = build_html_document(soup.find("title").text, extracted_tables)
 
-            driver.get(f"file:///{os.getcwd()}/temp.html")
+                set_page_content(driver, full_html, "generated_schedule")
 
-        print_pdf_to_zipfile(driver, filename, zip_buffer)
-    except WebDriverException as e:
-        st.write(f"**{filename}** :x:  \nReason: {e.msg}")
-    finally:
-        driver.quit()
+            print_pdf_to_zipfile(driver, filename, archive, url, "schedule")
+        except WebDriverException as e:
+            events.failed(filename, e.msg)
 
 
 def extract_tables(soup: BeautifulSoup) -> list[str] | None:
@@ -0,0 +1,128 @@
+import datetime as dt
+import functools
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, NamedTuple
+
+import events
+from archive import ArchiveWriter
+from articles import fetch_articles
+from box_scores import download_box_scores
+from resilience import with_deadline
+from roster import download_roster
+from schedule import download_schedule
+from stats import download_stats
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS = ["Roster", "Schedule", "Stats", "Box Scores", "Articles"]
+
+
+class JobOutcome(NamedTuple):
+    name: str
+    result: Any
+    error: Exception | None
+    elapsed: float
+
+
+def build_jobs(team_data: dict, artifacts: list[str], archive: ArchiveWriter, years: list[str] | None = None,
+               count: int | None = None, date_range: tuple[dt.date, dt.date] | None = None) -> dict[str, Callable]:
+    """
+    Builds one scrape job per selected artifact of a team.
+
+    Args:
+        team_data: Dictionary containing team data.
+        artifacts: Artifacts to scrape, a subset of ARTIFACTS.
+        archive: Archive the jobs write their PDF files to.
+        years: Years to download stats for. Required if "Stats" is selected.
+        count: Number of box scores to download. Required if "Box Scores" is selected.
+        date_range: Range of dates to fetch articles from. Required if "Articles" is selected.
+
+    Returns:
+        Mapping of artifact name to a callable that performs the job under its artifact's deadline. The "Articles" job
+        only fetches the list of articles and returns it, since which articles get downloaded is decided afterwards.
+    """
+    jobs = {}
+
+    if "Roster" in artifacts:
+        filename = f"{team_data['abbreviation']} Roster.pdf"
+        jobs["Roster"] = with_deadline("roster", functools.partial(download_roster, team_data["roster_url"], filename,
+                                                                   archive))
+
+    if "Schedule" in artifacts:
+        filename = f"{team_data['abbreviation']} Schedule.pdf"
+        jobs["Schedule"] = with_deadline("schedule", functools.partial(download_schedule, team_data["name"],
+                                                                       team_data["schedule_url"], filename, archive))
+
+    if "Box Scores" in artifacts:
+        jobs["Box Scores"] = with_deadline("box_scores", functools.partial(download_box_scores, team_data, count,
+                                                                           archive))
+
+    if "Stats" in artifacts:
+        jobs["Stats"] = with_deadline("stats", functools.partial(download_stats, team_data, years, archive))
+
+    if "Articles" in artifacts:
+        jobs["Articles"] = with_deadline("articles", functools.partial(fetch_articles, team_data, date_range))
+
+    return jobs
+
+
+def run_jobs(jobs: dict[str, Callable[[], Any]], max_workers: int) -> Iterator[events.ScrapeEvent | JobOutcome]:
+    """
+    Runs independent scrape jobs on a bounded thread pool and streams their progress back to the calling thread.
+
+    Args:
+        jobs: Mapping of job name to a callable that performs the job.
+        max_workers: Maximum number of jobs running at once.
+
+    Returns:
+        An iterator of the events the jobs emit and of the jobs' outcomes, in the order they happen. The outcome's
+        error is None if the job succeeded, and its result is None if it failed.
+    """
+    if not jobs:
+        return
+
+    updates: queue.Queue[events.ScrapeEvent | JobOutcome] = queue.Queue()
+
+    def run(name: str, job: Callable[[], Any]) -> None:
+        with events.capture(updates.put):
+            outcome = timed_job(name, job)
+        updates.put(outcome)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        for name, job in jobs.items():
+            executor.submit(run, name, job)
+
+        remaining = len(jobs)
+        while remaining:
+            update = updates.get()
+            if isinstance(update, JobOutcome):
+                remaining -= 1
+            yield update
+
+
+def timed_job(name: str, job: Callable[[], Any]) -> JobOutcome:
+    """
+    Runs a job, timing it and capturing any exception it raises.
+
+    Args:
+        name: Name of the job.
+        job: Callable that performs the job.
+
+    Returns:
+        The job's outcome.
+    """
+    start = time.perf_counter()
+
+    try:
+        result, error = job(), None
+    except Exception as e:
+        logger.exception("%s job failed", name)
+        result, error = None, e
+
+    elapsed = time.perf_counter() - start
+    logger.info("%s job finished in %.2fs", name, elapsed)
+
+    return JobOutcome(name, result, error, elapsed)
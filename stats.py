@@ -1,27 +1,28 @@
-import time
-from io import BytesIO
+import datetime as dt
 
-import streamlit as st
-from bs4 import BeautifulSoup
 from selenium.common import TimeoutException, WebDriverException
 
-from utils import initialize_web_driver, response_pdf_to_zipfile
+import events
+from archive import ArchiveWriter
+from cache import put_result
+from coalesce import coalesced
+from fetch import fetch_page, get_fetch_strategy
+from utils import cached_result_to_zipfile, download_pdfs_to_zipfile
 
 
-def download_stats(team_data: dict, years: list[int], zip_buffer: BytesIO) -> None:
+@coalesced("stats")
+def download_stats(team_data: dict, years: list[int], archive: ArchiveWriter) -> None:
     """
     Downloads a team's season stats to a PDF file.
 
     Args:
         team_data: Dictionary containing team data.
         years: Years for which to print stats for.
-        zip_buffer: Bytes buffer containing the roster page.
+        archive: Archive to write the PDF files to.
 
     Returns:
         None
     """
-    driver = initialize_web_driver()
-
     pdf_url_in_embed = [
         "Northwestern",
         "Indiana",
@@ -44,36 +45,94 @@ def download_stats(team_data: dict, years: list[int], zip_buffer: BytesIO) -> No
         "Chicago State"
     ]
 
+    strategy = get_fetch_strategy(team_data, "stats")
+    pdf_requests = []
+    years_by_filename = {}
+
     for year in years:
         filename = f"{team_data['abbreviation']} {year} Stats.pdf"
 
+        if cached_result_to_zipfile(team_data["name"], "stats", str(year), filename, archive):
+            continue
+
         try:
-            if (team_data["name"] == "Penn State") or (team_data["name"] == "Northern Illinois"):
-                driver.get(team_data["stats_url"][str(year)])
-            else:
-                driver.get(team_data["stats_url"].format(year))
+            url = stats_page_url(team_data, year)
+        except KeyError:
+            events.failed(filename, f"No stats URL for {year}.")
+            continue
 
-            time.sleep(1)
+        years_by_filename[filename] = str(year)
 
-            doc = BeautifulSoup(driver.page_source, "lxml")
+        try:
+            doc = fetch_page(url, "stats", strategy).doc
 
             if team_data["name"] in pdf_url_in_embed:
                 embed_tag = doc.find("embed")
                 if embed_tag:
-                    response_pdf_to_zipfile(embed_tag["src"], filename, zip_buffer)
+                    pdf_requests.append((embed_tag["src"], filename))
                     continue
             elif team_data["name"] in pdf_url_in_object:
                 object_tag = doc.find("object")
                 if object_tag:
-                    response_pdf_to_zipfile(object_tag["data"], filename, zip_buffer)
+                    pdf_requests.append((object_tag["data"], filename))
                     continue
 
-            st.write(f"**{filename}** :x:  \nReason: Could not find the PDF url.")
+            events.failed(filename, "Could not find the PDF url.")
         except TimeoutException as e:
-            st.write(f"**{filename}** :x:  \nReason: {e.msg}")
+            events.failed(filename, e.msg)
             continue
         except WebDriverException as e:
-            st.write(f"**{filename}** :x:  \nReason: {e.msg}")
+            events.failed(filename, e.msg)
             continue
 
-    driver.quit()
+    def store_result(filename: str, pdf_bytes: bytes) -> None:
+        year = years_by_filename[filename]
+        put_result(team_data["name"], "stats", year, pdf_bytes, is_completed_season(year))
+
+    download_pdfs_to_zipfile(pdf_requests, archive, "stats", store_result)
+
+
+def stats_page_url(team_data: dict, year: int | str) -> str:
+    """
+    Builds the URL of the page a season's stats PDF is found on.
+
+    Args:
+        team_data: Dictionary containing team data.
+        year: The season.
+
+    Returns:
+        The URL of the stats page.
+
+    Raises:
+        KeyError: If the team lists its stats pages by year and has none for this year.
+    """
+    if (team_data["name"] == "Penn State") or (team_data["name"] == "Northern Illinois"):
+        return team_data["stats_url"][str(year)]
+
+    return team_data["stats_url"].format(year)
+
+
+def current_season(today: dt.date) -> int:
+    """
+    Returns the season a date belongs to. Seasons start in August.
+
+    Args:
+        today: The date.
+
+    Returns:
+        The season's year.
+    """
+    return today.year if today.month >= 8 else today.year - 1
+
+
+def is_completed_season(year: int | str) -> bool:
+    """
+    Checks whether a season is over, meaning its stats can no longer change.
+
+    Args:
+        year: The season's year.
+
+    Returns:
+        True if the season was played before the current calendar year.
+    """
+    return int(year) < dt.date.today().year
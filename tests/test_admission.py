@@ -0,0 +1,97 @@
+import threading
+import time
+import unittest
+
+from admission import AdmissionCancelled, AdmissionController, BackgroundWork, running_in_background
+
+
+class AdmissionControllerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.controller = AdmissionController(1, 0)
+        self.order = []
+        self.threads = []
+
+    def queue_caller(self, name: str, work: BackgroundWork | None = None) -> None:
+        def run() -> None:
+            try:
+                if work is None:
+                    with self.controller.admit():
+                        self.order.append(name)
+                else:
+                    with running_in_background(work), self.controller.admit():
+                        self.order.append(name)
+            except AdmissionCancelled:
+                self.order.append(f"{name} cancelled")
+
+        queued = self.controller.stats().queued
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.threads.append(thread)
+
+        while self.controller.stats().queued == queued:
+            time.sleep(0.01)
+
+    def wait_for_callers(self) -> None:
+        for thread in self.threads:
+            thread.join(5)
+
+    def test_callers_are_admitted_in_arrival_order(self) -> None:
+        with self.controller.admit():
+            for name in ("first", "second", "third"):
+                self.queue_caller(name)
+
+        self.wait_for_callers()
+        self.assertEqual(self.order, ["first", "second", "third"])
+
+    def test_background_work_waits_behind_later_callers(self) -> None:
+        with self.controller.admit():
+            self.queue_caller("background", BackgroundWork())
+            self.queue_caller("foreground")
+
+        self.wait_for_callers()
+        self.assertEqual(self.order, ["foreground", "background"])
+
+    def test_promoted_work_keeps_its_place(self) -> None:
+        work = BackgroundWork()
+
+        with self.controller.admit():
+            self.queue_caller("background", work)
+            self.queue_caller("foreground")
+            work.promote()
+
+        self.wait_for_callers()
+        self.assertEqual(self.order, ["background", "foreground"])
+
+    def test_cancelled_background_work_gives_up(self) -> None:
+        work = BackgroundWork()
+
+        with self.controller.admit():
+            self.queue_caller("background", work)
+            work.cancel()
+            self.wait_for_callers()
+
+        self.assertEqual(self.order, ["background cancelled"])
+        self.assertEqual(self.controller.stats().queued, 0)
+
+    def test_promoted_work_ignores_cancellation(self) -> None:
+        work = BackgroundWork()
+        work.promote()
+        work.cancel()
+
+        with running_in_background(work), self.controller.admit():
+            self.assertEqual(self.controller.stats().active, 1)
+
+    def test_timeout(self) -> None:
+        with self.controller.admit():
+            start = time.perf_counter()
+            with self.assertRaises(TimeoutError):
+                with self.controller.admit(0.2):
+                    pass
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(self.controller.stats().active, 0)
+        self.assertEqual(self.controller.stats().queued, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import contextlib
+import datetime as dt
+import io
+import json
+import os
+import unittest
+
+try:
+    import batch
+except ModuleNotFoundError:
+    # batch imports the scrapers, which need Selenium and BeautifulSoup.
+    batch = None
+
+TEAMS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "teams.json")
+
+
+@unittest.skipIf(batch is None, "the scraper's dependencies are not installed")
+class ParseArgsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        with open(TEAMS_PATH, "r") as file:
+            self.teams = json.load(file)
+
+    def test_defaults(self) -> None:
+        args = batch.parse_args([], self.teams)
+
+        self.assertEqual(args.teams, list(self.teams.keys()))
+        self.assertEqual(args.end, dt.date.today())
+        self.assertEqual(args.start, dt.date(int(args.years[0]), 8, 1))
+
+    def test_rejects_counts_and_workers_below_one(self) -> None:
+        for argv in (["--count", "0"], ["--count", "-2"], ["--workers", "0"]):
+            with self.subTest(argv=argv), contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    batch.parse_args(argv, self.teams)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+import unittest
+
+from cache import PageCache
+
+
+class PageCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def make_cache(self, max_bytes: int = 1024) -> PageCache:
+        return PageCache(self.directory.name, max_bytes)
+
+    def objects(self) -> list[str]:
+        return os.listdir(os.path.join(self.directory.name, "objects"))
+
+    def test_put_then_get(self) -> None:
+        cache = self.make_cache()
+        cache.put("https://example.com/a", "http", b"body", 60)
+
+        self.assertEqual(cache.get("https://example.com/a", "http"), b"body")
+        self.assertIsNone(cache.get("https://example.com/a", "dom"))
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_expired_entry_is_a_miss(self) -> None:
+        cache = self.make_cache()
+        cache.put("https://example.com/a", "http", b"body", -1)
+
+        self.assertIsNone(cache.get("https://example.com/a", "http"))
+        self.assertIsNotNone(cache.lookup("https://example.com/a", "http"))
+
+    def test_identical_bodies_are_stored_once(self) -> None:
+        cache = self.make_cache()
+        cache.put("https://example.com/a", "http", b"shared", 60)
+        cache.put("https://example.com/b", "http", b"shared", 60)
+        self.assertEqual(len(self.objects()), 1)
+
+        # The body is still referenced by b, so replacing a keeps it.
+        cache.put("https://example.com/a", "http", b"other", 60)
+        self.assertEqual(len(self.objects()), 2)
+        self.assertEqual(cache.get("https://example.com/b", "http"), b"shared")
+
+        # Once nothing references it, the body is removed.
+        cache.put("https://example.com/b", "http", b"other", 60)
+        self.assertEqual(len(self.objects()), 1)
+
+    def test_evicts_least_recently_used_entry(self) -> None:
+        cache = self.make_cache(max_bytes=25)
+        cache.put("https://example.com/a", "http", b"a" * 10, 60)
+        time.sleep(0.01)
+        cache.put("https://example.com/b", "http", b"b" * 10, 60)
+        time.sleep(0.01)
+        cache.get("https://example.com/a", "http")
+        time.sleep(0.01)
+
+        cache.put("https://example.com/c", "http", b"c" * 10, 60)
+
+        self.assertIsNotNone(cache.lookup("https://example.com/a", "http"))
+        self.assertIsNone(cache.lookup("https://example.com/b", "http"))
+        self.assertIsNotNone(cache.lookup("https://example.com/c", "http"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(len(self.objects()), 2)
+
+    def test_permanent_entries_are_evicted_last(self) -> None:
+        cache = self.make_cache(max_bytes=25)
+        cache.put("https://example.com/permanent", "result", b"p" * 10, None)
+        time.sleep(0.01)
+        cache.put("https://example.com/expiring", "http", b"e" * 10, 60)
+        time.sleep(0.01)
+
+        cache.put("https://example.com/new", "http", b"n" * 10, 60)
+
+        self.assertIsNotNone(cache.lookup("https://example.com/permanent", "result"))
+        self.assertIsNone(cache.lookup("https://example.com/expiring", "http"))
+        self.assertIsNotNone(cache.lookup("https://example.com/new", "http"))
+
+    def test_no_eviction_within_the_cap(self) -> None:
+        cache = self.make_cache(max_bytes=30)
+        for name in ("a", "b", "c"):
+            cache.put(f"https://example.com/{name}", "http", name.encode() * 10, 60)
+
+        self.assertNotIn("evictions", cache.stats())
+
+    def test_sees_entries_written_by_another_instance(self) -> None:
+        writer = self.make_cache()
+        reader = self.make_cache()
+        reader.lookup("https://example.com/a", "http")
+
+        writer.put("https://example.com/a", "http", b"body", 60)
+
+        self.assertEqual(reader.get("https://example.com/a", "http"), b"body")
+
+    def test_index_is_rebuilt_from_disk(self) -> None:
+        self.make_cache().put("https://example.com/a", "http", b"a" * 10, 60)
+
+        cache = self.make_cache(max_bytes=15)
+        cache.put("https://example.com/b", "http", b"b" * 10, 60)
+
+        self.assertIsNone(cache.lookup("https://example.com/a", "http"))
+        self.assertEqual(cache.get("https://example.com/b", "http"), b"b" * 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+import threading
+import time
+import unittest
+import zipfile
+
+import coalesce
+from admission import AdmissionCancelled, BackgroundWork, running_in_background
+from archive import ArchiveWriter
+from coalesce import SingleFlight, coalesced
+
+
+def start_thread(target) -> threading.Thread:
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.flights = SingleFlight()
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.calls = 0
+
+    def blocking_call(self, result: object = "result") -> object:
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return result
+
+    def join_follower(self, results: list, share=None) -> threading.Thread:
+        thread = start_thread(lambda: results.append(self.flights.do("key", self.blocking_call, share)))
+        # The follower has joined once it is counted on the leader's call.
+        while self.flights._calls["key"].followers == 0:
+            time.sleep(0.01)
+        return thread
+
+    def test_followers_share_the_leaders_call(self) -> None:
+        results = []
+        leader = start_thread(lambda: results.append(self.flights.do("key", self.blocking_call)))
+        self.started.wait(5)
+        follower = self.join_follower(results)
+
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(self.calls, 1)
+        self.assertCountEqual(results, [("result", False), ("result", True)])
+
+    def test_errors_are_raised_in_every_caller(self) -> None:
+        errors = []
+
+        def failing_call() -> None:
+            self.started.set()
+            self.release.wait(5)
+            raise ValueError("failed")
+
+        def call() -> None:
+            try:
+                self.flights.do("key", failing_call)
+            except ValueError as e:
+                errors.append(e)
+
+        leader = start_thread(call)
+        self.started.wait(5)
+        follower = start_thread(call)
+        while self.flights._calls["key"].followers == 0:
+            time.sleep(0.01)
+
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(len(errors), 2)
+        self.assertIs(errors[0], errors[1])
+
+    def test_leader_waits_for_every_share(self) -> None:
+        shared = threading.Event()
+        leader_returned_after_share = []
+
+        def share(result: str) -> str:
+            time.sleep(0.2)
+            shared.set()
+            return result.upper()
+
+        def lead() -> None:
+            self.flights.do("key", self.blocking_call, share)
+            leader_returned_after_share.append(shared.is_set())
+
+        results = []
+        leader = start_thread(lead)
+        self.started.wait(5)
+        follower = self.join_follower(results, share)
+
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(results, [("RESULT", True)])
+        self.assertEqual(leader_returned_after_share, [True])
+
+    def test_real_caller_promotes_background_leader(self) -> None:
+        work = BackgroundWork()
+
+        def lead() -> None:
+            with running_in_background(work):
+                self.flights.do("key", self.blocking_call)
+
+        leader = start_thread(lead)
+        self.started.wait(5)
+        follower = self.join_follower([])
+
+        self.assertTrue(work.promoted)
+        work.cancel()
+        self.assertFalse(work.cancelled)
+
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+    def test_real_caller_reruns_a_cancelled_background_call(self) -> None:
+        work = BackgroundWork()
+        results = []
+
+        def cancelled_call() -> str:
+            self.calls += 1
+            self.started.set()
+            self.release.wait(5)
+            raise AdmissionCancelled("cancelled")
+
+        def lead() -> None:
+            with running_in_background(work):
+                with self.assertRaises(AdmissionCancelled):
+                    self.flights.do("key", cancelled_call)
+
+        leader = start_thread(lead)
+        self.started.wait(5)
+        follower = start_thread(lambda: results.append(self.flights.do("key", lambda: "rerun")))
+        while self.flights._calls["key"].followers == 0:
+            time.sleep(0.01)
+
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(results, [("rerun", False)])
+
+
+class CoalescedTest(unittest.TestCase):
+    def test_files_are_written_once_and_copied_to_followers(self) -> None:
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        @coalesced("test")
+        def scrape(name: str, archive: ArchiveWriter) -> None:
+            calls.append(name)
+            started.set()
+            release.wait(5)
+            archive.write(f"{name}.pdf", b"data")
+
+        leader_archive, follower_archive = ArchiveWriter(), ArchiveWriter()
+        leader_archive.write("other.pdf", b"written by another job")
+
+        leader = start_thread(lambda: scrape("a", leader_archive))
+        started.wait(5)
+        follower = start_thread(lambda: scrape("a", follower_archive))
+        while not any(call.followers for call in coalesce._flights._calls.values()):
+            time.sleep(0.01)
+
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(calls, ["a"])
+        self.assertEqual(zipfile.ZipFile(leader_archive.download_file()).namelist(), ["other.pdf", "a.pdf"])
+        self.assertEqual(zipfile.ZipFile(follower_archive.download_file()).namelist(), ["a.pdf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import datetime as dt
+import unittest
+
+from cron import CronSchedule, parse_cron_field
+
+
+class ParseCronFieldTest(unittest.TestCase):
+    def test_wildcard(self) -> None:
+        self.assertEqual(parse_cron_field("*", 0, 6), set(range(7)))
+
+    def test_single_value(self) -> None:
+        self.assertEqual(parse_cron_field("5", 0, 59), {5})
+
+    def test_range(self) -> None:
+        self.assertEqual(parse_cron_field("1-5", 0, 6), {1, 2, 3, 4, 5})
+
+    def test_wildcard_step(self) -> None:
+        self.assertEqual(parse_cron_field("*/15", 0, 59), {0, 15, 30, 45})
+
+    def test_range_step(self) -> None:
+        self.assertEqual(parse_cron_field("8-20/4", 0, 23), {8, 12, 16, 20})
+
+    def test_value_step_runs_to_the_end_of_the_range(self) -> None:
+        self.assertEqual(parse_cron_field("5/10", 0, 59), {5, 15, 25, 35, 45, 55})
+
+    def test_list(self) -> None:
+        self.assertEqual(parse_cron_field("1,3-4,*/20", 0, 59), {0, 1, 3, 4, 20, 40})
+
+    def test_out_of_range(self) -> None:
+        for field in ("60", "0", "5-3", "*/0"):
+            with self.subTest(field=field), self.assertRaises(ValueError):
+                parse_cron_field(field, 1, 59)
+
+    def test_malformed(self) -> None:
+        with self.assertRaises(ValueError):
+            parse_cron_field("a", 0, 59)
+
+
+class CronScheduleTest(unittest.TestCase):
+    # A Saturday.
+    NOW = dt.datetime(2026, 10, 17, 6, 30, 15)
+
+    def test_daily(self) -> None:
+        self.assertEqual(CronSchedule("0 5 * * *").next_run(self.NOW), dt.datetime(2026, 10, 18, 5, 0))
+
+    def test_next_run_is_strictly_after(self) -> None:
+        self.assertEqual(CronSchedule("30 6 * * *").next_run(self.NOW), dt.datetime(2026, 10, 18, 6, 30))
+
+    def test_weekdays(self) -> None:
+        self.assertEqual(CronSchedule("*/20 2-4 * * 1-5").next_run(self.NOW), dt.datetime(2026, 10, 19, 2, 0))
+
+    def test_sunday_as_seven(self) -> None:
+        for expression in ("0 5 * * 7", "0 5 * * 0", "0 5 * * 6-7"):
+            with self.subTest(expression=expression):
+                self.assertEqual(CronSchedule(expression).next_run(dt.datetime(2026, 10, 17, 6, 0)),
+                                 dt.datetime(2026, 10, 18, 5, 0))
+
+    def test_day_of_month_or_day_of_week(self) -> None:
+        # Restricted day of month and day of week fire on either.
+        self.assertEqual(CronSchedule("0 5 20 * 1").next_run(self.NOW), dt.datetime(2026, 10, 19, 5, 0))
+
+    def test_wrong_field_count(self) -> None:
+        with self.assertRaises(ValueError):
+            CronSchedule("0 5 * *")
+
+    def test_never_fires(self) -> None:
+        with self.assertRaises(ValueError):
+            CronSchedule("0 0 30 2 *").next_run(self.NOW)
+
+
+if __name__ == "__main__":
+    unittest.main()
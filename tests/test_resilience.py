@@ -0,0 +1,113 @@
+import time
+import unittest
+
+from resilience import CircuitBreaker, call_with_retries, deadline, get_breaker, time_left
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker("example.com", 2, 60)
+
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.stats().state, "open")
+        self.assertEqual(breaker.stats().trips, 1)
+
+    def test_success_resets_the_streak(self) -> None:
+        breaker = CircuitBreaker("example.com", 2, 60)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        self.assertEqual(breaker.stats().state, "closed")
+        self.assertEqual(breaker.stats().failures, 2)
+
+    def test_lets_one_trial_through_after_the_cooldown(self) -> None:
+        breaker = CircuitBreaker("example.com", 1, 0.05)
+        breaker.record_failure()
+        time.sleep(0.1)
+
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.stats().state, "half_open")
+        self.assertFalse(breaker.allow())
+
+    def test_trial_success_closes_the_breaker(self) -> None:
+        breaker = CircuitBreaker("example.com", 1, 0.05)
+        breaker.record_failure()
+        time.sleep(0.1)
+        breaker.allow()
+
+        breaker.record_success()
+
+        self.assertEqual(breaker.stats().state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_trial_failure_opens_the_breaker_again(self) -> None:
+        breaker = CircuitBreaker("example.com", 3, 0.05)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.1)
+        breaker.allow()
+
+        breaker.record_failure()
+
+        self.assertEqual(breaker.stats().state, "open")
+        self.assertEqual(breaker.stats().trips, 2)
+        self.assertFalse(breaker.allow())
+
+    def test_threshold_zero_never_opens(self) -> None:
+        breaker = CircuitBreaker("example.com", 0, 60)
+        for _ in range(10):
+            breaker.record_failure()
+
+        self.assertTrue(breaker.allow())
+
+
+class CallWithRetriesTest(unittest.TestCase):
+    def fail_once(self, url: str, error: Exception, is_answered=None) -> None:
+        def attempt() -> None:
+            raise error
+
+        with self.assertRaises(type(error)):
+            call_with_retries(url, attempt, lambda e: False, RuntimeError, is_answered)
+
+    def test_unanswered_failure_leaves_the_breaker_alone(self) -> None:
+        breaker = get_breaker("https://crashed.example.com")
+        breaker.record_failure()
+
+        self.fail_once("https://crashed.example.com/page", ValueError("invalid session id"))
+
+        self.assertEqual(breaker._consecutive_failures, 1)
+
+    def test_answered_failure_counts_as_healthy(self) -> None:
+        breaker = get_breaker("https://answered.example.com")
+        breaker.record_failure()
+
+        self.fail_once("https://answered.example.com/page", ValueError("404"), lambda e: True)
+
+        self.assertEqual(breaker._consecutive_failures, 0)
+
+    def test_gives_up_past_the_deadline(self) -> None:
+        with deadline(0):
+            with self.assertRaisesRegex(RuntimeError, "deadline"):
+                call_with_retries("https://late.example.com/page", lambda: None, lambda e: False, RuntimeError)
+
+
+class TimeLeftTest(unittest.TestCase):
+    def test_without_deadline(self) -> None:
+        self.assertEqual(time_left(5), 5)
+        self.assertIsNone(time_left(None))
+
+    def test_capped_by_deadline(self) -> None:
+        with deadline(1):
+            self.assertLessEqual(time_left(5), 1)
+            self.assertLessEqual(time_left(None), 1)
+            self.assertEqual(time_left(0.5), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,29 +1,151 @@
 import base64
-import zipfile
-from io import BytesIO
+import contextvars
+import functools
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, Callable, Iterator, NamedTuple
 
 import requests
-import streamlit as st
 from bs4 import Tag
+from requests.adapters import HTTPAdapter
 from selenium import webdriver
-from selenium.common import InvalidArgumentException
+from selenium.common import WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.print_page_options import PrintOptions
 from webdriver_manager.chrome import ChromeDriverManager
 from webdriver_manager.core.os_manager import ChromeType
 
+import events
+from archive import ArchiveWriter
+from cache import get_page_cache, get_result
+from config import (BLOCK_REQUESTS, CACHE_TTLS, CHROMEDRIVER_PATH, CHROMIUM_PATH, HTTP_POOL_SIZE, HTTP_TIMEOUT, OFFLINE,
+                    PAGE_LOAD_TIMEOUT, PDF_DOWNLOAD_WORKERS, SCRIPT_TIMEOUT)
+from ratelimit import throttle
+from resilience import call_with_retries, time_left
 
-def initialize_web_driver() -> webdriver.Chrome:
+logger = logging.getLogger(__name__)
+
+LOCAL_CHROMEDRIVER_PATHS = [
+    "/usr/bin/chromedriver",
+    "/usr/lib/chromium/chromedriver",
+    "/usr/lib/chromium-browser/chromedriver",
+]
+
+LOCAL_CHROMIUM_NAMES = ["chromium", "chromium-browser"]
+
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/126.0.0.0 Safari/537.36")
+
+# Page.printToPDF parameters matching the defaults of Selenium's print_page: US Letter with 1cm margins.
+PRINT_PARAMETERS = {
+    "transferMode": "ReturnAsStream",
+    "paperWidth": 8.5,
+    "paperHeight": 11,
+    "marginTop": 1 / 2.54,
+    "marginBottom": 1 / 2.54,
+    "marginLeft": 1 / 2.54,
+    "marginRight": 1 / 2.54,
+}
+
+# Bytes read from Chromium per IO.read call when streaming a printed PDF.
+PRINT_CHUNK_SIZE = 256 * 1024
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+class DriverBinaries(NamedTuple):
+    chromedriver_path: str
+    chromium_path: str | None
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    content: bytes
+    content_type: str | None
+
+
+class PdfDownload(NamedTuple):
+    pdf_bytes: bytes | None
+    error: requests.RequestException | None
+    elapsed: float
+
+
+@functools.cache
+def resolve_driver_binaries() -> DriverBinaries:
+    """
+    Locates the chromedriver/Chromium pair once per process and verifies that the chromedriver runs.
+
+    webdriver-manager is tried first. If it fails (for example on offline workers) or is disabled via
+    NU_SCRAPER_OFFLINE, the pinned NU_SCRAPER_CHROMEDRIVER_PATH or a system-installed chromedriver is used.
+
+    Returns:
+        The resolved chromedriver path and the Chromium binary path (None to let Selenium find it).
+    """
+    start = time.perf_counter()
+    chromedriver_path = None
+
+    if not OFFLINE:
+        try:
+            chromedriver_path = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
+        except Exception as e:
+            logger.warning("webdriver-manager could not resolve chromedriver, falling back to a local binary: %s", e)
+
+    if not chromedriver_path:
+        chromedriver_path = find_local_chromedriver()
+
+    version = subprocess.run([chromedriver_path, "--version"], capture_output=True, text=True, timeout=10,
+                             check=True).stdout.strip()
+
+    chromium_path = CHROMIUM_PATH or next(filter(None, map(shutil.which, LOCAL_CHROMIUM_NAMES)), None)
+
+    logger.info("Resolved %s (%s) with Chromium %s in %.2fs", chromedriver_path, version, chromium_path,
+                time.perf_counter() - start)
+
+    return DriverBinaries(chromedriver_path, chromium_path)
+
+
+def find_local_chromedriver() -> str:
+    """
+    Finds a pinned or system-installed chromedriver binary.
+
+    Returns:
+        Path of the chromedriver binary.
+
+    Raises:
+        FileNotFoundError: If no chromedriver binary could be found.
+    """
+    candidates = [CHROMEDRIVER_PATH, shutil.which("chromedriver"), *LOCAL_CHROMEDRIVER_PATHS]
+
+    for candidate in candidates:
+        if candidate and os.access(candidate, os.X_OK):
+            return candidate
+
+    raise FileNotFoundError("Could not find a chromedriver binary. Set NU_SCRAPER_CHROMEDRIVER_PATH to pin one.")
+
+
+def initialize_web_driver(driver_class: type[webdriver.Chrome] = webdriver.Chrome) -> webdriver.Chrome:
     """
     Initializes a new web driver instance.
 
+    Args:
+        driver_class: The Chrome driver class to instantiate.
+
     Returns:
         A new web driver instance.
     """
-    service = Service(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
+    binaries = resolve_driver_binaries()
+    service = Service(binaries.chromedriver_path)
 
     chrome_options = Options()
+    if binaries.chromium_path:
+        chrome_options.binary_location = binaries.chromium_path
     chrome_options.add_argument("--headless")
     chrome_options.add_argument('--no-sandbox')
     chrome_options.add_argument("--disable-dev-shm-usage")
@@ -32,7 +154,159 @@ def initialize_web_driver() -> webdriver.Chrome:
     chrome_options.add_argument("--disable-software-rasterizer")
     chrome_options.add_argument("--single-process")
 
-    return webdriver.Chrome(service=service, options=chrome_options)
+    if BLOCK_REQUESTS:
+        # The network events in the performance log are how the requests the blocklists stop are counted.
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+
+    driver = driver_class(service=service, options=chrome_options)
+
+    # Without these, a page or script that never finishes loading holds the driver, and the scrape, indefinitely.
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+
+    return driver
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session. Its adapter keeps a keep-alive connection pool per host that is shared
+    by every scrape.
+
+    Returns:
+        The shared requests session.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers["User-Agent"] = USER_AGENT
+
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+
+    return _session
+
+
+def cached_http_get(url: str, artifact: str) -> CachedResponse:
+    """
+    Sends an HTTP GET request through the page cache. Fresh entries are served from disk, stale entries are
+    revalidated with If-None-Match/If-Modified-Since, and successful responses are cached for the artifact's TTL.
+
+    Args:
+        url: URL to request.
+        artifact: Artifact the response belongs to, which decides its TTL.
+
+    Returns:
+        The response's status code, body and content type.
+
+    Raises:
+        requests.RequestException: If the request times out or the server responds with an error other than 404.
+    """
+    cache = get_page_cache()
+    ttl = CACHE_TTLS[artifact]
+
+    entry = cache.lookup(url, "http")
+    if (entry is not None) and entry.fresh:
+        body = cache.read(entry)
+        if body is not None:
+            cache.record("hits")
+            return CachedResponse(200, body, entry.content_type)
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    response = http_get(url, headers)
+
+    if (response.status_code == 304) and (entry is not None):
+        body = cache.read(entry)
+        if body is not None:
+            cache.refresh(entry, ttl)
+            cache.record("revalidations")
+            return CachedResponse(200, body, entry.content_type)
+
+        # The body was evicted while the request was in flight, so ask again without the validators.
+        response = http_get(url, {})
+
+    cache.record("misses")
+
+    if response.status_code == 404:
+        return CachedResponse(404, b"", None)
+
+    response.raise_for_status()
+    body = response.content
+
+    content_type = response.headers.get("Content-Type")
+    cache.put(url, "http", body, ttl, etag=response.headers.get("ETag"),
+              last_modified=response.headers.get("Last-Modified"), content_type=content_type)
+
+    return CachedResponse(200, body, content_type)
+
+
+def http_get(url: str, headers: dict[str, str]) -> requests.Response:
+    """
+    Sends an HTTP GET request through the host's rate limiter and circuit breaker, retrying timeouts, connection errors,
+    429 and 5xx responses with backoff. The request's timeout is capped to what is left of the current deadline.
+
+    Args:
+        url: URL to request.
+        headers: Extra request headers.
+
+    Returns:
+        The response, with its body read.
+
+    Raises:
+        requests.RequestException: If every attempt failed, the host is skipped by its circuit breaker, or the deadline
+            has passed.
+    """
+    def attempt() -> requests.Response:
+        with throttle(url) as limiter:
+            response = get_http_session().get(url, headers=headers, timeout=time_left(HTTP_TIMEOUT))
+            limiter.observe(response.status_code, response.headers.get("Retry-After"))
+
+        if (response.status_code == 429) or (response.status_code >= 500):
+            response.raise_for_status()
+
+        return response
+
+    return call_with_retries(url, attempt, is_transient_request_error, requests.ConnectionError,
+                             is_answered_request_error)
+
+
+def is_transient_request_error(error: Exception) -> bool:
+    """
+    Checks whether a failed HTTP request is worth retrying.
+
+    Args:
+        error: The exception the request raised.
+
+    Returns:
+        True for timeouts, connection errors, 429 and 5xx responses.
+    """
+    if isinstance(error, requests.HTTPError):
+        return (error.response is not None) and ((error.response.status_code == 429) or
+                                                 (error.response.status_code >= 500))
+
+    return isinstance(error, (requests.Timeout, requests.ConnectionError))
+
+
+def is_answered_request_error(error: Exception) -> bool:
+    """
+    Checks whether a failed HTTP request was still answered by its host.
+
+    Args:
+        error: The exception the request raised.
+
+    Returns:
+        True for error responses, ie: 404.
+    """
+    return isinstance(error, requests.HTTPError) and (error.response is not None)
 
 
 def sanitize_html(doc: Tag | None) -> str:
@@ -55,51 +329,196 @@ def sanitize_html(doc: Tag | None) -> str:
     return str(doc)
 
 
-def print_pdf_to_zipfile(driver: webdriver.Chrome, filename: str, zip_buffer: BytesIO) -> None:
+def cached_print_to_zipfile(url: str, filename: str, archive: ArchiveWriter) -> bool:
+    """
+    Writes a previously printed page from the page cache to the zip file, if it is still fresh.
+
+    Args:
+        url: URL of the page that was printed.
+        filename: The filename of the PDF file.
+        archive: Archive to write the PDF file to.
+
+    Returns:
+        True if the PDF was served from the cache, False if the page needs to be printed.
+    """
+    pdf_bytes = get_page_cache().get(url, "pdf")
+    if pdf_bytes is None:
+        return False
+
+    archive.write(filename, pdf_bytes)
+    events.succeeded(filename, 0.0)
+
+    return True
+
+
+def cached_result_to_zipfile(team_name: str, artifact: str, key: str, filename: str,
+                             archive: ArchiveWriter) -> bool:
     """
-    Performs Selenium's print function and saves the PDF bytes to the zip file.
+    Writes a finished artifact from the result cache to the zip file, if it is cached.
+
+    Args:
+        team_name: Name of the team.
+        artifact: Name of the artifact, ie: "stats" or "box_scores".
+        key: Identifies the result within the artifact, ie: the year or the match.
+        filename: The filename of the PDF file.
+        archive: Archive to write the PDF file to.
+
+    Returns:
+        True if the PDF was served from the cache, False if it needs to be scraped.
+    """
+    pdf_bytes = get_result(team_name, artifact, key)
+    if pdf_bytes is None:
+        return False
+
+    archive.write(filename, pdf_bytes)
+    events.succeeded(filename, 0.0)
+
+    return True
+
+
+def print_pdf_to_zipfile(driver: webdriver.Chrome, filename: str, archive: ArchiveWriter, url: str,
+                         artifact: str) -> None:
+    """
+    Prints the current page and saves the PDF to the zip file and the page cache.
+
+    The PDF is streamed out of Chromium in chunks into a private temporary file, then copied from there into the
+    archive and, on a best-effort basis, into the page cache, so memory use stays flat however long the document is
+    and the archive never depends on the cache keeping the file.
 
     Args:
         driver: Selenium webdriver instance.
         filename: The filename of the PDF file.
-        zip_buffer: The buffer to write the PDF file to.
+        archive: Archive to write the PDF file to.
+        url: URL of the page being printed, used as the cache key.
+        artifact: Artifact the page belongs to, which decides how long the PDF is cached.
 
     Returns:
         None
     """
+    start = time.perf_counter()
+
     try:
-        print(driver.current_url)
-        print_options = PrintOptions()
-        pdf = driver.print_page(print_options)
-        pdf_bytes = base64.b64decode(pdf)
+        with tempfile.TemporaryFile() as pdf:
+            for chunk in stream_print_to_pdf(driver):
+                pdf.write(chunk)
 
-        with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-            zip_file.writestr(filename, pdf_bytes)
+            pdf.seek(0)
+            with archive.open_entry(filename) as entry:
+                shutil.copyfileobj(pdf, entry, PRINT_CHUNK_SIZE)
 
-        st.write(f"**{filename}** :white_check_mark:")
-    except InvalidArgumentException as e:
-        st.write(f"**{filename}** :x:  \nReason: {e.msg}")
+            pdf.seek(0)
+            cache_pdf(pdf, url, artifact)
 
+        events.succeeded(filename, time.perf_counter() - start)
+    except WebDriverException as e:
+        events.failed(filename, e.msg, time.perf_counter() - start)
 
-def response_pdf_to_zipfile(pdf_url: str, filename: str, zip_buffer: BytesIO) -> None:
+
+def cache_pdf(pdf: IO[bytes], url: str, artifact: str) -> None:
     """
-    Sends an HTTP GET request for PDF bytes and writes them to a zip file.
+    Stores a printed PDF in the page cache. Failing to cache it is logged but not reported, since the PDF has already
+    been archived.
 
     Args:
-        pdf_url: The URL of the PDF file.
-        filename: The filename of the PDF file.
-        zip_buffer: The buffer to write the PDF file to.
+        pdf: Binary file object positioned at the start of the PDF.
+        url: URL of the page that was printed, used as the cache key.
+        artifact: Artifact the page belongs to, which decides how long the PDF is cached.
 
     Returns:
         None
     """
-    response = requests.get(pdf_url)
-    if response.status_code == 404:
-        st.write(
-            f"**{filename}** :x:  \nReason: Found a PDF URL, but it doesn't link to an existing file.")
+    try:
+        with get_page_cache().open_put(url, "pdf", CACHE_TTLS[artifact], "application/pdf") as body:
+            shutil.copyfileobj(pdf, body, PRINT_CHUNK_SIZE)
+    except OSError as e:
+        logger.warning("Could not cache the printed PDF of %s: %s", url, e)
+
+
+def stream_print_to_pdf(driver: webdriver.Chrome) -> Iterator[bytes]:
+    """
+    Prints the current page with CDP's Page.printToPDF and reads the result back as a stream.
+
+    Args:
+        driver: Selenium webdriver instance.
+
+    Returns:
+        An iterator of the PDF's bytes, in chunks of at most PRINT_CHUNK_SIZE bytes.
+    """
+    handle = driver.execute_cdp_cmd("Page.printToPDF", PRINT_PARAMETERS)["stream"]
+
+    try:
+        while True:
+            chunk = driver.execute_cdp_cmd("IO.read", {"handle": handle, "size": PRINT_CHUNK_SIZE})
+
+            data = chunk.get("data", "")
+            if data:
+                yield base64.b64decode(data) if chunk.get("base64Encoded") else data.encode()
+
+            if chunk.get("eof"):
+                return
+    finally:
+        driver.execute_cdp_cmd("IO.close", {"handle": handle})
+
+
+def download_pdfs_to_zipfile(pdf_requests: list[tuple[str, str]], archive: ArchiveWriter, artifact: str,
+                             on_downloaded: Callable[[str, bytes], None] | None = None) -> None:
+    """
+    Downloads a batch of PDFs in parallel over the shared HTTP session and writes each one to the zip file as soon
+    as it arrives.
+
+    Args:
+        pdf_requests: List of (pdf_url, filename) pairs.
+        archive: Archive to write the PDF files to.
+        artifact: Artifact the PDFs belong to, which decides how long they are cached.
+        on_downloaded: Optional callback receiving the filename and bytes of every PDF that was downloaded.
+
+    Returns:
+        None
+    """
+    if not pdf_requests:
         return
 
-    with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-        zip_file.writestr(filename, response.content)
+    with ThreadPoolExecutor(max_workers=min(PDF_DOWNLOAD_WORKERS, len(pdf_requests))) as executor:
+        # Each download runs in a copy of this thread's context, so that the scrape's deadline applies to it.
+        futures = {executor.submit(contextvars.copy_context().run, fetch_pdf_bytes, pdf_url, artifact): filename
+                   for pdf_url, filename in pdf_requests}
+
+        for future in as_completed(futures):
+            filename = futures[future]
+            download = future.result()
+
+            if download.error is not None:
+                events.failed(filename, str(download.error), download.elapsed)
+                continue
+
+            if download.pdf_bytes is None:
+                events.failed(filename, "Found a PDF URL, but it doesn't link to an existing file.", download.elapsed)
+                continue
+
+            archive.write(filename, download.pdf_bytes)
+            if on_downloaded is not None:
+                on_downloaded(filename, download.pdf_bytes)
+
+            events.succeeded(filename, download.elapsed)
+
+
+def fetch_pdf_bytes(pdf_url: str, artifact: str) -> PdfDownload:
+    """
+    Downloads a PDF through the page cache, timing the download on its own rather than from the start of its batch.
+
+    Args:
+        pdf_url: The URL of the PDF file.
+        artifact: Artifact the PDF belongs to, which decides how long it is cached.
+
+    Returns:
+        The PDF bytes, or None if the URL doesn't link to an existing file, the error if the request timed out or the
+        server responded with an error, and the seconds the download took.
+    """
+    start = time.perf_counter()
+
+    try:
+        response = cached_http_get(pdf_url, artifact)
+    except requests.RequestException as e:
+        return PdfDownload(None, e, time.perf_counter() - start)
 
-    st.write(f"**{filename}** :white_check_mark:")
+    return PdfDownload(response.content if response.status_code != 404 else None, None, time.perf_counter() - start)
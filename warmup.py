@@ -0,0 +1,262 @@
+import argparse
+import datetime as dt
+import functools
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple
+from urllib.parse import urlsplit
+
+from articles import fetch_articles
+from cache import CacheEntry, get_page_cache, result_url
+from conference import get_conference_box_scores
+from config import WARMUP_HOST_CONCURRENCY, WARMUP_SCHEDULE, WARMUP_WORKERS
+from cron import CronSchedule
+from fetch import get_fetch_strategy
+from prefetch import warm_archive
+from roster import download_roster
+from schedule import download_schedule
+from stats import current_season, download_stats
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupTask(NamedTuple):
+    team_name: str
+    artifact: str
+    host: str
+    run: Callable[[], object]
+    cache_keys: list[tuple[str, str]]
+
+
+def build_tasks(team_data: dict, today: dt.date) -> list[WarmupTask]:
+    """
+    Builds the warm-up tasks of one team: its roster, schedule, current season's stats, conference schedule and
+    article listing.
+
+    Args:
+        team_data: Dictionary containing team data.
+        today: The current date, which decides the season.
+
+    Returns:
+        The team's tasks. Each task lists the cache entries it fills, for the freshness report.
+    """
+    season = str(current_season(today))
+    team_name = team_data["name"]
+    abbreviation = team_data["abbreviation"]
+    conference_url = team_data["conference_base_url"]
+
+    if team_data["conference_schedule_provider"] == "Boost":
+        conference_schedule_url = f"{conference_url}/msoc/schedule/"
+    else:
+        conference_schedule_url = f"{conference_url}/calendar.aspx?path=msoc"
+
+    return [
+        WarmupTask(team_name, "roster", urlsplit(team_data["roster_url"]).netloc,
+                   functools.partial(warm_archive, download_roster, team_data["roster_url"],
+                                     f"{abbreviation} Roster.pdf"),
+                   [(team_data["roster_url"], "pdf")]),
+        WarmupTask(team_name, "schedule", urlsplit(team_data["schedule_url"]).netloc,
+                   functools.partial(warm_archive, download_schedule, team_name, team_data["schedule_url"],
+                                     f"{abbreviation} Schedule.pdf"),
+                   [(team_data["schedule_url"], "pdf")]),
+        WarmupTask(team_name, "stats", urlsplit(team_data["base_url"]).netloc,
+                   functools.partial(warm_archive, download_stats, team_data, [season]),
+                   [(result_url(team_name, "stats", season), "result")]),
+        WarmupTask(team_name, "conference_schedule", urlsplit(conference_url).netloc,
+                   functools.partial(get_conference_box_scores, team_data, get_fetch_strategy(team_data, "box_scores")),
+                   [(conference_schedule_url, "http"), (conference_schedule_url, "dom")]),
+        WarmupTask(team_name, "articles", urlsplit(team_data["articles_url"]).netloc,
+                   functools.partial(fetch_articles, team_data, (dt.date(int(season), 8, 1), today)),
+                   [(result_url(team_name, "article_index", "index"), "result")]),
+    ]
+
+
+def run_tasks(tasks: list[WarmupTask], workers: int, host_concurrency: int) -> list[tuple[WarmupTask, str | None]]:
+    """
+    Runs warm-up tasks on a bounded pool, with at most host_concurrency tasks hitting any one host at once.
+
+    Args:
+        tasks: The tasks.
+        workers: Maximum number of tasks running at once.
+        host_concurrency: Maximum number of tasks running at once per host.
+
+    Returns:
+        Every task with its error message, None if it succeeded.
+    """
+    host_slots = {task.host: threading.BoundedSemaphore(host_concurrency) for task in tasks}
+
+    def run(task: WarmupTask) -> tuple[WarmupTask, str | None]:
+        start = time.perf_counter()
+
+        with host_slots[task.host]:
+            try:
+                task.run()
+                error = None
+            except Exception as e:
+                logger.exception("Warming %s %s failed", task.team_name, task.artifact)
+                error = str(e)
+
+        logger.info("Warmed %s %s in %.2fs", task.team_name, task.artifact, time.perf_counter() - start)
+        return task, error
+
+    # Tasks are interleaved by host so that the pool is not filled with tasks waiting on the same host.
+    by_host = defaultdict(list)
+    for task in tasks:
+        by_host[task.host].append(task)
+    ordered = [task for group in itertools.zip_longest(*by_host.values()) for task in group if task is not None]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, ordered))
+
+
+def freshness_report(tasks: list[WarmupTask]) -> list[dict]:
+    """
+    Reports how fresh the cached data of every team and artifact is.
+
+    Args:
+        tasks: The warm-up tasks, whose cache entries are looked up.
+
+    Returns:
+        One row per task with the team, artifact, status ("fresh", "stale" or "missing") and age in seconds.
+    """
+    cache = get_page_cache()
+    rows = []
+
+    for task in tasks:
+        entries: list[CacheEntry] = [entry for url, mode in task.cache_keys
+                                     if (entry := cache.lookup(url, mode)) is not None]
+        entry = max(entries, key=lambda item: item.stored_at, default=None)
+
+        if entry is None:
+            rows.append({"team": task.team_name, "artifact": task.artifact, "status": "missing", "age": None})
+        else:
+            rows.append({"team": task.team_name, "artifact": task.artifact,
+                         "status": "fresh" if entry.fresh else "stale", "age": round(time.time() - entry.stored_at)})
+
+    return rows
+
+
+def print_report(rows: list[dict]) -> None:
+    """
+    Prints a freshness report.
+
+    Args:
+        rows: Rows returned by freshness_report.
+
+    Returns:
+        None
+    """
+    for row in rows:
+        age = "-" if row["age"] is None else f"{row['age'] / 60:.0f} min"
+        print(f"{row['team']:<18} {row['artifact']:<20} {row['status']:<8} {age}")
+
+
+def crawl(teams: dict, team_names: list[str], workers: int, host_concurrency: int) -> list[WarmupTask]:
+    """
+    Warms every artifact of the selected teams and prints the freshness report.
+
+    Args:
+        teams: Dictionary of team data loaded from teams.json.
+        team_names: Teams to warm.
+        workers: Maximum number of tasks running at once.
+        host_concurrency: Maximum number of tasks running at once per host.
+
+    Returns:
+        The tasks that were run.
+    """
+    start = time.perf_counter()
+    today = dt.date.today()
+    tasks = [task for team_name in team_names for task in build_tasks(teams[team_name], today)]
+
+    results = run_tasks(tasks, workers, host_concurrency)
+    failures = [(task, error) for task, error in results if error is not None]
+
+    print(f"Warmed {len(tasks) - len(failures)}/{len(tasks)} artifact(s) in {time.perf_counter() - start:.1f}s")
+    for task, error in failures:
+        print(f"    FAILED {task.team_name} {task.artifact}: {error}")
+
+    print_report(freshness_report(tasks))
+    return tasks
+
+
+def parse_args(argv: list[str], teams: dict) -> argparse.Namespace:
+    """
+    Parses the command line.
+
+    Args:
+        argv: Command line arguments, without the program name.
+        teams: Dictionary of team data loaded from teams.json.
+
+    Returns:
+        The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Warm the scraper's caches for every team on a schedule.")
+    parser.add_argument("--schedule", default=WARMUP_SCHEDULE,
+                        help=f"Cron expression of when to crawl (default: {WARMUP_SCHEDULE!r}).")
+    parser.add_argument("--once", action="store_true", help="Crawl once now and exit.")
+    parser.add_argument("--report", action="store_true", help="Print the freshness report and exit.")
+    parser.add_argument("--json", action="store_true", help="Print the freshness report as JSON.")
+    parser.add_argument("--teams", nargs="+", choices=list(teams.keys()), default=list(teams.keys()),
+                        metavar="TEAM", help="Teams to warm. Defaults to every team in teams.json.")
+    parser.add_argument("--workers", type=int, default=WARMUP_WORKERS,
+                        help=f"Number of artifacts warmed at once (default: {WARMUP_WORKERS}).")
+    parser.add_argument("--host-concurrency", type=int, default=WARMUP_HOST_CONCURRENCY,
+                        help=f"Number of artifacts warmed at once per host (default: {WARMUP_HOST_CONCURRENCY}).")
+
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.host_concurrency < 1:
+        parser.error("--host-concurrency must be at least 1")
+
+    return args
+
+
+def main(argv: list[str]) -> int:
+    """
+    Crawls the selected teams whenever the schedule fires, or once with --once.
+
+    Args:
+        argv: Command line arguments, without the program name.
+
+    Returns:
+        The process exit code.
+    """
+    logging.basicConfig(level=logging.INFO)
+
+    with open("teams.json", "r") as file:
+        teams: dict = json.load(file)
+
+    args = parse_args(argv, teams)
+
+    if args.report:
+        rows = freshness_report([task for team_name in args.teams
+                                 for task in build_tasks(teams[team_name], dt.date.today())])
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print_report(rows)
+        return 0
+
+    if args.once:
+        crawl(teams, args.teams, args.workers, args.host_concurrency)
+        return 0
+
+    schedule = CronSchedule(args.schedule)
+    while True:
+        next_run = schedule.next_run(dt.datetime.now())
+        logger.info("Next warm-up crawl at %s", next_run.isoformat(sep=" "))
+        time.sleep(max((next_run - dt.datetime.now()).total_seconds(), 0))
+
+        crawl(teams, args.teams, args.workers, args.host_concurrency)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))